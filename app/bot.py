@@ -4,13 +4,19 @@ from datetime import datetime
 import discord
 from discord.ext import commands
 from dotenv import load_dotenv
-from bruno_core.models import Message as BrunoMessage
-from app.lib.common import get_agent
+from bruno_core.models import AssistantResponse, Message as BrunoMessage
+from bruno_core.models.context import ConversationContext, SessionContext, UserContext
+from app import config
+from app.lib.common import get_agent, get_summarizer
 import app.crud.user as user_crud
-from app.db.session import get_db_session
+from app.db.async_session import async_session_scope
 from app.db.models import Conversation, Message
-from app.lib.memory_store import MemoryStore
-from app.lib.user_manager import UserManager
+from app.lib.cache import identity_cache
+from app.lib.memory_store import AsyncMemoryStore, MessageWriteQueue
+from app.lib.user_manager import AsyncUserManager
+from app.core.intent_router import format_duration
+from app.core.llm_scheduler import SchedulerBusyError
+from app.core.timer_engine import KIND_WARNING, TimerNotification
 
 
 # Load environment variables from .env file
@@ -20,17 +26,24 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("bruno.discord.text")
 
 class DiscordTextBot:
-    def __init__(self, token: str, cooldown_seconds: int = 2):
+    def __init__(self, token: str, cooldown_seconds: int = 2, stream_replies: bool = config.DISCORD_STREAM_REPLIES):
         intents = discord.Intents.default()
         intents.message_content = True
         self.bot = commands.Bot(command_prefix="!", intents=intents)
         self.token = token
         self.user_last_message = {}  # user_id -> datetime
         self.cooldown_seconds = cooldown_seconds
-        self.bruno_agent = get_agent()
-        self.db = get_db_session()
-        self.memory_store = MemoryStore(self.db)
-        self.user_manager = UserManager(self.db)
+        self.message_queue = MessageWriteQueue()
+        self.bruno_agent = get_agent(history_loader=self.message_queue.recent_messages)
+        self.summarizer = get_summarizer(self.bruno_agent.llm_client) if config.SUMMARY_ENABLED else None
+        if self.summarizer:
+            self.bruno_agent.summary_loader = self.summarizer.get_summary
+        self.timer_ability = self.bruno_agent.timer_ability
+        self.notes_ability = self.bruno_agent.notes_ability
+        if self.timer_ability:
+            self.timer_ability.engine.notify = self._notify_timer
+        self.stream_replies = stream_replies
+        self.stream_edit_interval = config.DISCORD_STREAM_EDIT_INTERVAL
         
         self._register_handlers()
 
@@ -60,6 +73,110 @@ class DiscordTextBot:
                 await channel.send(chunk.strip())
         return send_chunks()
 
+    @staticmethod
+    def _split_point(text: str, start: int, max_len: int) -> int:
+        """Index at which to roll over to a new message, preferring a line or word break."""
+        end = start + max_len
+        for sep in ("\n", " "):
+            cut = text.rfind(sep, start, end)
+            if cut > start + max_len // 2:
+                return cut + 1
+        return end
+
+    async def _stream_to_channel(self, channel, chunks, max_len: int = 2000) -> str:
+        """Post the first tokens as soon as they arrive, then edit the message in rate-limited batches.
+
+        Text beyond ``max_len`` rolls over into a new message. Returns the full text.
+        """
+        loop = asyncio.get_running_loop()
+        text = ""
+        start = 0       # offset in text where the current Discord message begins
+        current = None  # Discord message being edited
+        shown = ""      # content currently displayed in it
+        last_flush = 0.0
+
+        async def flush():
+            nonlocal start, current, shown
+            while len(text) - start > max_len:
+                cut = self._split_point(text, start, max_len)
+                segment = text[start:cut].strip()
+                if segment:
+                    if current is None:
+                        await channel.send(segment)
+                    elif segment != shown:
+                        await current.edit(content=segment)
+                current, shown, start = None, "", cut
+            segment = text[start:].strip()
+            if segment and segment != shown:
+                if current is None:
+                    current = await channel.send(segment)
+                else:
+                    await current.edit(content=segment)
+                shown = segment
+
+        async for chunk in chunks:
+            text += chunk
+            if current is None and not text[start:].strip():
+                continue
+            # The first visible tokens go out immediately, later ones in batches
+            if current is None or loop.time() - last_flush >= self.stream_edit_interval:
+                await flush()
+                last_flush = loop.time()
+        await flush()
+        return text.strip()
+
+    async def _stream_response(self, channel, msg: BrunoMessage, context: ConversationContext):
+        usage, outcome = {}, {}
+        try:
+            text = await self._stream_to_channel(
+                channel, self.bruno_agent.stream_message(msg, context, usage=usage, outcome=outcome)
+            )
+        except SchedulerBusyError as e:
+            busy_message = self.bruno_agent.config.busy_message
+            await channel.send(busy_message)
+            return AssistantResponse(
+                text=busy_message,
+                success=False,
+                error=str(e),
+                metadata={"busy": True, "streamed": True}
+            )
+        except Exception as e:
+            logger.error(f"Error streaming response: {e}", exc_info=True)
+            return None
+        if not text:
+            return None
+        task_response = outcome.get("response")
+        if task_response is not None:
+            # A task command's failure is reported as such, not as a streamed reply
+            return AssistantResponse(
+                text=text,
+                actions=task_response.actions,
+                success=task_response.success,
+                error=task_response.error,
+                metadata={**task_response.metadata, "streamed": True}
+            )
+        return AssistantResponse(
+            text=text,
+            success=True,
+            metadata={**self.bruno_agent.usage_metadata(usage), "streamed": True}
+        )
+
+    async def _notify_timer(self, notification: TimerNotification):
+        """Post a timer warning or completion to the channel the timer was set in."""
+        timer = notification.timer
+        try:
+            channel_id = int(timer.conversation_id)
+            channel = self.bot.get_channel(channel_id) or await self.bot.fetch_channel(channel_id)
+        except (TypeError, ValueError, discord.DiscordException) as e:
+            logger.warning(f"No channel for timer {timer.id} ({timer.conversation_id}): {e}")
+            return
+        if notification.kind == KIND_WARNING:
+            left = format_duration(config.TIMER_WARNING_SECONDS)
+            text = f"⏳ Timer '{timer.name}' ends in {left}."
+        else:
+            text = f"⏰ Timer '{timer.name}' is done!"
+        await channel.send(text)
+
     def _register_handlers(self):
         @self.bot.event
         async def on_ready():
@@ -79,11 +196,23 @@ class DiscordTextBot:
                 return
             
             response = await self._handle_text_message(message, str(message.author.id), message.author.name)  
+            if response and response.metadata.get("streamed"):
+                return  # already posted progressively
             response_text = response.text if response else "Sorry, I couldn't process your request."
             await self._split_and_send(message.channel, response_text)
 
-    async def _handle_text_message(self, message: discord.Message, user_id: str, username: str) -> str:
-        print(f"Processing command from {username} ({user_id}): {message.content}")
+    async def _resolve_ids(self, discord_id: int, username: str):
+        """Return (user_id, conversation_id), skipping the database for cached Discord users."""
+        cached = identity_cache.get(discord_id)
+        if cached is not None:
+            return cached
+        async with async_session_scope() as db:
+            user = await AsyncUserManager(db).get_user_by_discord_id(discord_id, username)
+            conversation_id = await AsyncMemoryStore(db).resolve_conversation_id(discord_id, user.id)
+        return user.id, conversation_id
+
+    async def _handle_text_message(self, message: discord.Message, discord_id: str, username: str) -> str:
+        print(f"Processing command from {username} ({discord_id}): {message.content}")
 
         content = message.content.strip()
             # Remove trigger word
@@ -96,32 +225,75 @@ class DiscordTextBot:
         show_typing = True
 
         async with message.channel.typing() if show_typing else asyncio.nullcontext():
-            user = self.user_manager.get_user_by_username(username)
-            
-            conversation = self.memory_store.get_conversations_for_user(user.id)
-            if not conversation:
-                conversation = self.memory_store.create_conversation(user.id, title="Discord Conversation")
-            
-            
-            self.memory_store.add_message(
-                conversation_id=conversation.id,
+            # users.id owns timers, notes and memories; the Discord snowflake does not fit those keys
+            user_id, conversation_id = await self._resolve_ids(message.author.id, username)
+
+            # Messages are persisted by the write-behind queue, off the reply path
+            self.message_queue.enqueue(
+                conversation_id=conversation_id,
                 role="user",
                 content=content
             )
             msg = BrunoMessage(
                     role="user",
-                    content=content
+                    content=content,
+                    conversation_id=str(conversation_id),
+                    metadata={
+                        "user_id": str(user_id),
+                        "discord_id": discord_id,
+                        "is_dm": isinstance(message.channel, discord.DMChannel),
+                        "channel_id": str(message.channel.id)
+                    }
                 )
-            response = await self.bruno_agent.process_message(msg)
-            self.memory_store.add_message(
-                conversation_id=conversation.id,
+            context = ConversationContext(
+                conversation_id=str(conversation_id),
+                user=UserContext(user_id=str(user_id), name=username),
+                session=SessionContext(user_id=str(user_id), conversation_id=str(conversation_id))
+            )
+            if self.stream_replies:
+                response = await self._stream_response(message.channel, msg, context)
+            else:
+                response = await self.bruno_agent.process_message(msg, context)
+            if response is None:
+                return None
+            if response.metadata.get("busy") or not response.success:
+                return response  # busy notices and errors are not part of the conversation
+            self.message_queue.enqueue(
+                conversation_id=conversation_id,
                 role="assistant",
                 content=response.text
             )
+            if self.summarizer:
+                self.summarizer.schedule(conversation_id)
             return response
 
+    async def start(self):
+        """Run the bot and flush pending messages once it stops."""
+        async with self.bot:
+            await self.message_queue.start()
+            if self.summarizer:
+                await self.summarizer.start()
+            if self.timer_ability:
+                await self.timer_ability.initialize()
+            if self.notes_ability:
+                await self.notes_ability.initialize()
+            try:
+                await self.bot.start(self.token)
+            finally:
+                if self.notes_ability:
+                    await self.notes_ability.cleanup()
+                if self.timer_ability:
+                    await self.timer_ability.cleanup()
+                if self.summarizer:
+                    await self.summarizer.close()
+                await self.message_queue.close()
+                await self.bruno_agent.shutdown()
+
     def run(self):
-        self.bot.run(self.token)
+        try:
+            asyncio.run(self.start())
+        except KeyboardInterrupt:
+            pass
 
 if __name__ == "__main__":
     token = os.getenv("DISCORD_TOKEN")
@@ -14,3 +14,97 @@ DISCORD_SERVER_ID = os.getenv("DISCORD_SERVER_ID")
 LLM_PROVIDER = os.getenv("LLM_PROVIDER", "ollama")
 LLM_MODEL = os.getenv("LLM_MODEL", "mistral:7b")
 LLM_API_URL = os.getenv("LLM_API_URL", "http://localhost:11434")
+
+# Database Pool Configuration
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() in ("1", "true", "yes")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# Message Persistence Configuration
+MESSAGE_FLUSH_BATCH_SIZE = int(os.getenv("MESSAGE_FLUSH_BATCH_SIZE", "50"))
+MESSAGE_FLUSH_INTERVAL = float(os.getenv("MESSAGE_FLUSH_INTERVAL", "1.0"))
+MESSAGE_QUEUE_MAX_PENDING = int(os.getenv("MESSAGE_QUEUE_MAX_PENDING", "10000"))  # oldest unpersisted messages dropped beyond this
+MESSAGE_FLUSH_MAX_RETRIES = int(os.getenv("MESSAGE_FLUSH_MAX_RETRIES", "5"))  # consecutive failures before a batch is dropped
+
+# Identity Cache Configuration (Discord user -> user/conversation ids)
+IDENTITY_CACHE_SIZE = int(os.getenv("IDENTITY_CACHE_SIZE", "10000"))
+IDENTITY_CACHE_TTL = float(os.getenv("IDENTITY_CACHE_TTL", "3600"))
+
+# LLM HTTP Connection Pool Configuration
+LLM_HTTP_LIMIT = int(os.getenv("LLM_HTTP_LIMIT", "100"))
+LLM_HTTP_LIMIT_PER_HOST = int(os.getenv("LLM_HTTP_LIMIT_PER_HOST", "0"))
+LLM_HTTP_KEEPALIVE = float(os.getenv("LLM_HTTP_KEEPALIVE", "60"))
+LLM_HTTP_CONNECT_TIMEOUT = float(os.getenv("LLM_HTTP_CONNECT_TIMEOUT", "10"))
+LLM_HTTP_TIMEOUT = float(os.getenv("LLM_HTTP_TIMEOUT", "300"))
+
+# Discord Streaming Configuration
+DISCORD_STREAM_REPLIES = os.getenv("DISCORD_STREAM_REPLIES", "true").lower() in ("1", "true", "yes")
+# Seconds between progressive edits; Discord allows about 5 edits per 5 seconds per channel
+DISCORD_STREAM_EDIT_INTERVAL = float(os.getenv("DISCORD_STREAM_EDIT_INTERVAL", "1.0"))
+
+# Ollama API Configuration
+LLM_API_MODE = os.getenv("LLM_API_MODE", "chat")  # "chat" (/api/chat) or "generate" (/api/generate)
+LLM_KEEP_ALIVE = os.getenv("LLM_KEEP_ALIVE", "30m")
+LLM_REUSE_CONTEXT = os.getenv("LLM_REUSE_CONTEXT", "false").lower() in ("1", "true", "yes")
+
+# LLM Scheduler Configuration (0 disables the concurrency cap)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "2"))  # per endpoint
+LLM_MAX_QUEUE_WAIT = float(os.getenv("LLM_MAX_QUEUE_WAIT", "30"))
+
+# LLM Response Cache Configuration (size 0 disables caching; coalescing stays on)
+LLM_RESPONSE_CACHE_SIZE = int(os.getenv("LLM_RESPONSE_CACHE_SIZE", "512"))
+LLM_RESPONSE_CACHE_TTL = float(os.getenv("LLM_RESPONSE_CACHE_TTL", "600"))
+LLM_RESPONSE_CACHE_MAX_TEMPERATURE = float(os.getenv("LLM_RESPONSE_CACHE_MAX_TEMPERATURE", "0.2"))
+
+# LLM Router Configuration (comma-separated LLM_API_URLS enables load balancing)
+LLM_API_URLS = [url.strip() for url in os.getenv("LLM_API_URLS", "").split(",") if url.strip()]
+LLM_ROUTER_STRATEGY = os.getenv("LLM_ROUTER_STRATEGY", "least_outstanding")  # or "latency"
+LLM_ROUTER_FAILURE_THRESHOLD = int(os.getenv("LLM_ROUTER_FAILURE_THRESHOLD", "3"))
+LLM_ROUTER_COOLDOWN = float(os.getenv("LLM_ROUTER_COOLDOWN", "30"))
+LLM_HEALTH_CHECK_INTERVAL = float(os.getenv("LLM_HEALTH_CHECK_INTERVAL", "15"))
+
+# Conversation History Configuration
+LLM_CONTEXT_WINDOW = int(os.getenv("LLM_CONTEXT_WINDOW", "4096"))
+LLM_HISTORY_MESSAGES = int(os.getenv("LLM_HISTORY_MESSAGES", "20"))
+
+# Token Counting Configuration
+LLM_TOKENIZER_PATH = os.getenv("LLM_TOKENIZER_PATH") or None  # Hugging Face tokenizer.json for exact counts
+LLM_CHARS_PER_TOKEN = float(os.getenv("LLM_CHARS_PER_TOKEN", "4.0"))  # starting ratio for estimates
+LLM_TOKEN_CACHE_SIZE = int(os.getenv("LLM_TOKEN_CACHE_SIZE", "4096"))
+
+# Conversation Summary Configuration
+SUMMARY_ENABLED = os.getenv("SUMMARY_ENABLED", "true").lower() in ("1", "true", "yes")
+SUMMARY_BATCH_SIZE = int(os.getenv("SUMMARY_BATCH_SIZE", "40"))  # messages folded in per LLM call
+SUMMARY_MIN_MESSAGES = int(os.getenv("SUMMARY_MIN_MESSAGES", "10"))  # backlog needed before summarizing
+SUMMARY_IDLE_SECONDS = float(os.getenv("SUMMARY_IDLE_SECONDS", "60"))
+SUMMARY_MAX_TOKENS = int(os.getenv("SUMMARY_MAX_TOKENS", "300"))
+
+# Long-term Memory Configuration
+MEMORY_ENABLED = os.getenv("MEMORY_ENABLED", "true").lower() in ("1", "true", "yes")
+MEMORY_EMBED_MODEL = os.getenv("MEMORY_EMBED_MODEL", "nomic-embed-text")
+MEMORY_EMBED_URL = os.getenv("MEMORY_EMBED_URL") or None  # defaults to LLM_API_URL
+MEMORY_INDEX_PATH = os.getenv("MEMORY_INDEX_PATH", "data/memory")
+MEMORY_TOP_K = int(os.getenv("MEMORY_TOP_K", "5"))
+MEMORY_MIN_SIMILARITY = float(os.getenv("MEMORY_MIN_SIMILARITY", "0.5"))
+
+# Conversation Cache Configuration
+MEMORY_CACHE_MAX_MESSAGES = int(os.getenv("MEMORY_CACHE_MAX_MESSAGES", "200"))  # per conversation
+MEMORY_CACHE_MAX_BYTES = int(os.getenv("MEMORY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "10000"))
+SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", "3600"))  # seconds
+MEMORY_CACHE_DB_TTL = float(os.getenv("MEMORY_CACHE_DB_TTL", "30"))  # seconds before a cached conversation is re-read
+
+# Timer Configuration
+TIMER_WARNING_SECONDS = int(os.getenv("TIMER_WARNING_SECONDS", "180"))  # heads-up before a timer ends
+
+# Intent Routing Configuration
+INTENT_LLM_FALLBACK = os.getenv("INTENT_LLM_FALLBACK", "false").lower() in ("1", "true", "yes")  # LLM parse for ambiguous task commands
+
+# Notes State Configuration
+NOTES_STATE_BACKEND = os.getenv("NOTES_STATE_BACKEND", "memory")  # "memory" or "database" (shared, survives restarts)
+NOTES_STATE_CACHE_SIZE = int(os.getenv("NOTES_STATE_CACHE_SIZE", "10000"))
+NOTES_STATE_TTL = float(os.getenv("NOTES_STATE_TTL", "3600"))  # seconds idle before a conversation leaves notes mode
+NOTES_STATE_CACHE_TTL = float(os.getenv("NOTES_STATE_CACHE_TTL", "30"))  # database backend: local read cache, 0 disables
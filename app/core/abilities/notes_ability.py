@@ -4,55 +4,47 @@ import logging
 from bruno_abilities import BaseAbility, AbilityMetadata, ParameterMetadata
 from bruno_abilities.base.ability_base import AbilityContext, AbilityResult
 
-logger = logging.getLogger(__name__)
+import app.crud.note as note_crud
+from app.core.intent_router import Intent, IntentRouter
+from app.db.async_session import async_session_scope
+from app.lib.notes_state import InMemoryNotesStateStore
 
-class NotesState:
-    """Tracks the state of the notes interface for each conversation."""
-    def __init__(self):
-        self.conversation_states: Dict[str, Dict[str, Any]] = {}
-    
-    def get_state(self, conversation_id: str) -> Dict[str, Any]:
-        """Get state for a conversation."""
-        if conversation_id not in self.conversation_states:
-            self.conversation_states[conversation_id] = {
-                'in_notes_mode': False,
-                'current_note_id': None,
-                'view': 'none'  # 'none', 'list', 'detail'
-            }
-        return self.conversation_states[conversation_id]
-    
-    def set_state(self, conversation_id: str, **kwargs):
-        """Update state for a conversation."""
-        state = self.get_state(conversation_id)
-        state.update(kwargs)
-    
-    def exit_notes(self, conversation_id: str):
-        """Exit notes mode."""
-        self.conversation_states[conversation_id] = {
-            'in_notes_mode': False,
-            'current_note_id': None,
-            'view': 'none'
-        }
-
-
-# Global notes state manager
-notes_state = NotesState()
+logger = logging.getLogger(__name__)
 
 class NotesAbility(BaseAbility):
     """Manages note-taking functionality for Bruno, extending BaseAbility."""
-    
-    def __init__(self):
+
+    def __init__(
+        self,
+        router: Optional[IntentRouter] = None,
+        session_scope=async_session_scope,
+        state_store=None,
+        max_entries_shown: int = 50
+    ):
+        """
+        Args:
+            router: Intent router used to classify raw commands
+            session_scope: Async context manager yielding a database session
+            state_store: Per-conversation notes-mode state (in-memory LRU by default)
+            max_entries_shown: Most recent entries rendered when a note is opened
+        """
         super().__init__()
-        from app.db.models import Note, NoteEntry
-        self.Note = Note
-        self.NoteEntry = NoteEntry
+        self.router = router or IntentRouter()
+        self.state_store = state_store or InMemoryNotesStateStore()
+        self._session_scope = session_scope
+        self.max_entries_shown = max_entries_shown
         logger.info("Initialized NotesAbility")
-    
+
+    async def _cleanup(self) -> None:
+        await self.state_store.close()
+
     @property
     def metadata(self) -> AbilityMetadata:
         """Return metadata describing this ability."""
         return AbilityMetadata(
             name="notes",
+            display_name="Notes",
+            category="productivity",
             description="Manage notes and journal entries",
             version="1.0.0",
             parameters=[
@@ -70,31 +62,167 @@ class NotesAbility(BaseAbility):
                 )
             ]
         )
-    
-    def _execute(self, parameters: dict[str, Any], context: AbilityContext) -> AbilityResult:
+
+    async def _execute(self, parameters: dict[str, Any], context: AbilityContext) -> AbilityResult:
         """Internal execution method implementing the ability logic."""
         command = parameters.get("command", "")
         user_id = context.user_id
         conversation_id = parameters.get("conversation_id", "default")
-        
+
         # Handle notes command using legacy method
-        response = self.handle_notes_command(user_id, conversation_id, command)
-        
+        response = await self.handle_notes_command(user_id, conversation_id, command)
+
         if response:
             return AbilityResult(
                 success=True,
-                message=response
+                data={"message": response}
             )
         else:
             return AbilityResult(
                 success=False,
-                message="Not a notes command"
+                error="Not a notes command"
             )
-    
-    def handle_notes_command(
+
+    async def in_notes_mode(self, conversation_id: str) -> bool:
+        return (await self.state_store.get_state(conversation_id)).in_notes_mode
+
+    async def handle_notes_command(
         self,
         user_id: str,
         conversation_id: str,
         command: str
-    ) -> str:
-        print("Handling notes command is called, needs to be implemented")
\ No newline at end of file
+    ) -> Optional[str]:
+        """Run ``command`` if it is a notes command and return the reply, otherwise None.
+
+        In notes mode, any message that is not a command becomes an entry of the open note.
+        """
+        intent = self.router.classify(command.strip())
+        if intent is None and await self.in_notes_mode(conversation_id):
+            intent = Intent("note_add", {"content": command.strip()}, command)
+        if intent is None or intent.ability != "notes":
+            return None
+        return await self.handle_intent(intent, user_id, conversation_id)
+
+    async def handle_intent(
+        self,
+        intent: Intent,
+        user_id: str,
+        conversation_id: str,
+        channel_id: Optional[str] = None
+    ) -> Optional[str]:
+        """Handle a notes command the agent's intent router already classified.
+
+        ``user_id`` is the owner's ``users.id`` (from the agent's conversation
+        context), not a Discord id; ``Note.user_id`` references ``users.id``.
+        """
+        try:
+            owner = int(user_id)
+        except (TypeError, ValueError):
+            return "I couldn't tell whose notes those are."
+        handler = getattr(self, f"_{intent.action}", None)
+        if handler is None:
+            return None
+        async with self._session_scope() as db:
+            return await handler(db, owner, conversation_id, intent.params)
+
+    # ==================== Commands ====================
+
+    async def _create(self, db, user_id: int, conversation_id: str, params: Dict[str, Any]) -> str:
+        note = await note_crud.create_note_async(db, user_id, params.get("name") or 'Untitled')
+        await self.state_store.set_state(conversation_id, db, in_notes_mode=True, current_note_id=note.id, view='detail')
+        return f"Created note '{note.name}'. Everything you send now goes into it; say 'exit notes' when you're done."
+
+    async def _add(self, db, user_id: int, conversation_id: str, params: Dict[str, Any]) -> str:
+        content = params.get("content")
+        if not content:
+            return "What should I add to the note?"
+        note = await self._current_note(db, user_id, conversation_id)
+        await note_crud.add_entry_async(db, note.id, content)
+        return f"Added to '{note.name}'."
+
+    async def _insert(self, db, user_id: int, conversation_id: str, params: Dict[str, Any]) -> str:
+        content = params.get("content")
+        if not params.get("index") or not content:
+            return "Tell me where and what to insert, e.g. 'insert at 2: buy eggs'."
+        note = await self._current_note(db, user_id, conversation_id)
+        await note_crud.insert_entry_async(db, note.id, params["index"], content)
+        return f"Inserted at position {params['index']} in '{note.name}'."
+
+    async def _remove(self, db, user_id: int, conversation_id: str, params: Dict[str, Any]) -> str:
+        if not params.get("index"):
+            return "Which entry should I remove? e.g. 'remove entry 2'."
+        note = await self._current_note(db, user_id, conversation_id, create=False)
+        if note is None:
+            return "Open a note first."
+        removed = await note_crud.delete_entry_async(db, note.id, params["index"])
+        if removed is None:
+            return f"'{note.name}' has no entry {params['index']}."
+        return f"Removed entry {params['index']} from '{note.name}': {removed}"
+
+    async def _list(self, db, user_id: int, conversation_id: str, params: Dict[str, Any]) -> str:
+        notes = await note_crud.get_notes_with_counts_async(db, user_id)
+        await self.state_store.set_state(conversation_id, db, view='list')
+        if not notes:
+            return "You don't have any notes yet. Say 'new note <name>' to start one."
+        lines = [
+            f"{i}. {note.name} ({count} {'entry' if count == 1 else 'entries'})"
+            for i, (note, count) in enumerate(notes, start=1)
+        ]
+        return "Your notes:\n" + "\n".join(lines)
+
+    async def _open(self, db, user_id: int, conversation_id: str, params: Dict[str, Any]) -> str:
+        note = await self._find_note(db, user_id, params.get("name"))
+        if note is None:
+            return f"I couldn't find a note called '{params.get('name')}'." if params.get("name") else "Which note?"
+        await self.state_store.set_state(conversation_id, db, in_notes_mode=True, current_note_id=note.id, view='detail')
+        entries, total = await note_crud.get_latest_entries_async(db, note.id, self.max_entries_shown)
+        return self._render(note, entries, total)
+
+    async def _delete(self, db, user_id: int, conversation_id: str, params: Dict[str, Any]) -> str:
+        note = await self._find_note(db, user_id, params.get("name"))
+        if note is None:
+            return f"I couldn't find a note called '{params.get('name')}'." if params.get("name") else "Which note?"
+        await note_crud.delete_note_async(db, note.id)
+        if (await self.state_store.get_state(conversation_id, db)).current_note_id == note.id:
+            await self.state_store.exit_notes(conversation_id, db)
+        return f"Deleted note '{note.name}'."
+
+    async def _exit(self, db, user_id: int, conversation_id: str, params: Dict[str, Any]) -> str:
+        await self.state_store.exit_notes(conversation_id, db)
+        return "Closed your notes."
+
+    # ==================== Helpers ====================
+
+    async def _current_note(self, db, user_id: int, conversation_id: str, create: bool = True):
+        """The note open in this conversation, else the user's latest note, else a new 'Untitled' one."""
+        note_id = (await self.state_store.get_state(conversation_id, db)).current_note_id
+        note = await note_crud.get_note_async(db, note_id) if note_id else None
+        if note is None or note.user_id != user_id:
+            note = await note_crud.get_latest_note_async(db, user_id)
+        if note is None and create:
+            note = await note_crud.create_note_async(db, user_id)
+        if note is not None:
+            await self.state_store.set_state(conversation_id, db, current_note_id=note.id)
+        return note
+
+    async def _find_note(self, db, user_id: int, name: Optional[str]):
+        """A note by name, or by its number in the notes list ("open note 2")."""
+        if not name:
+            return None
+        note = await note_crud.get_note_by_name_async(db, user_id, name)
+        if note is None and name.isdigit():
+            notes = await note_crud.get_notes_with_counts_async(db, user_id)
+            if 1 <= int(name) <= len(notes):
+                note = notes[int(name) - 1][0]
+        return note
+
+    def _render(self, note, entries, total: int) -> str:
+        """Render the note's last entries, numbered by their position in the whole note."""
+        if not entries:
+            return f"**{note.name}** is empty. Send a message to add to it."
+        start = total - len(entries)
+        lines = [f"**{note.name}**"]
+        if start:
+            lines.append(f"(showing the last {len(entries)} of {total} entries)")
+        lines.extend(f"{i}. {entry.content}" for i, entry in enumerate(entries, start=start + 1))
+        return "\n".join(lines)
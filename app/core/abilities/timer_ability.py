@@ -1,28 +1,32 @@
-import re
 import logging
-from typing import Dict, Any, Optional
-from datetime import timedelta
+from typing import Dict, Any, List, Optional
+from datetime import datetime
 
 # Import interfaces from published bruno packages
 from bruno_abilities import BaseAbility, AbilityMetadata, ParameterMetadata
-from bruno_abilities.base.ability_base import AbilityContext, AbilityResult 
+from bruno_abilities.base.ability_base import AbilityContext, AbilityResult
+
+from app.core.intent_router import Intent, IntentRouter, format_duration
+from app.core.timer_engine import TimerEngine, TimerState, STATUS_PAUSED
 
 logger = logging.getLogger(__name__)
 
 class TimerAbility(BaseAbility):
     """Manages timer functionality for Bruno, extending BaseAbility."""
-    
-    def __init__(self):
+
+    def __init__(self, engine: Optional[TimerEngine] = None, router: Optional[IntentRouter] = None):
         super().__init__()
-        from app.db.models import Timer
-        self.Timer = Timer
+        self.engine = engine or TimerEngine()
+        self.router = router or IntentRouter()
         logger.info("Initialized TimerAbility")
-    
+
     @property
     def metadata(self) -> AbilityMetadata:
         """Return metadata describing this ability."""
         return AbilityMetadata(
             name="timer",
+            display_name="Timer",
+            category="productivity",
             description="Manage timers and reminders",
             version="1.0.0",
             parameters=[
@@ -34,43 +38,138 @@ class TimerAbility(BaseAbility):
                 )
             ]
         )
-    
-    def _execute(self, parameters: dict[str, Any], context: AbilityContext) -> AbilityResult:
+
+    async def _initialize(self) -> None:
+        await self.engine.start()
+
+    async def _cleanup(self) -> None:
+        await self.engine.close()
+
+    async def _execute(self, parameters: dict[str, Any], context: AbilityContext) -> AbilityResult:
         """Internal execution method implementing the ability logic."""
         command = parameters.get("command", "")
-        user_id = context.user_id
-        
+
         # Parse and execute timer command
         timer_data = self._parse_timer_command(command)
-        
+
         if timer_data['action'] == 'none':
             return AbilityResult(
                 success=False,
-                message="Not a timer command"
+                error="Not a timer command"
             )
-        
+
         # Execute the timer command
-        response = self._execute_timer_command(user_id, timer_data)
-        
+        response = await self._execute_timer_command(
+            context.user_id,
+            timer_data,
+            conversation_id=context.metadata.get("channel_id") or context.conversation_id
+        )
+
         return AbilityResult(
             success=True,
-            message=response,
-            data=timer_data
+            data={**timer_data, "message": response}
         )
-    
-    def handle_timer_command(
+
+    async def handle_timer_command(
         self,
         user_id: str,
-        conversation_id: str, 
-        command: str
+        conversation_id: str,
+        command: str,
+        channel_id: Optional[str] = None
     ) -> Optional[str]:
-        print("Handling timer command is called, needs to be implemented")
+        """Run ``command`` if it is a timer command and return the reply, otherwise None.
+
+        ``user_id`` is the owner's ``users.id``, not a Discord id. Notifications
+        go to ``channel_id`` (a Discord channel) when given, else to ``conversation_id``.
+        """
+        timer_data = self._parse_timer_command(command)
+        if timer_data['action'] == 'none':
+            return None
+        return await self._execute_timer_command(user_id, timer_data, conversation_id=channel_id or conversation_id)
+
+    async def handle_intent(
+        self,
+        intent: Intent,
+        user_id: str,
+        conversation_id: str,
+        channel_id: Optional[str] = None
+    ) -> Optional[str]:
+        """Like ``handle_timer_command`` for a message the agent's router already classified."""
+        return await self._execute_timer_command(user_id, self._timer_data(intent), conversation_id=channel_id or conversation_id)
 
-    
     def _parse_timer_command(self, command: str) -> Dict[str, Any]:
         """Parse timer command using regex patterns with LLM fallback."""
-        print("Parsing timer command is called, needs to be implemented")
-    
-    def _execute_timer_command(self, user_id: str, timer_data: Dict[str, Any]) -> str:
+        intent = self.router.classify(command.strip())
+        if intent is None or intent.ability != 'timer':
+            return {'action': 'none'}
+        return self._timer_data(intent)
+
+    @staticmethod
+    def _timer_data(intent: Intent) -> Dict[str, Any]:
+        timer_data = {'action': intent.action, 'name': intent.params.get('name')}
+        if intent.action == 'create':
+            seconds = intent.params['duration_seconds']
+            timer_data['duration_seconds'] = seconds
+            timer_data['name'] = timer_data['name'] or format_duration(seconds)
+        return timer_data
+
+    async def _execute_timer_command(
+        self,
+        user_id: str,
+        timer_data: Dict[str, Any],
+        conversation_id: Optional[str] = None
+    ) -> str:
         """Execute the timer command and return a response message."""
-        print("Executing timer command is called, needs to be implemented")
\ No newline at end of file
+        try:
+            owner = int(user_id)
+        except (TypeError, ValueError):
+            return "I couldn't tell whose timer that is."
+        action = timer_data['action']
+
+        if action == 'create':
+            timer = await self.engine.create_timer(
+                owner,
+                timer_data['name'],
+                timer_data['duration_seconds'],
+                conversation_id=str(conversation_id) if conversation_id is not None else None
+            )
+            return f"Timer '{timer.name}' set for {format_duration(timer.duration_seconds)}."
+
+        timers = self.engine.get_timers(owner)
+        if action == 'list':
+            if not timers:
+                return "You have no active timers."
+            now = datetime.now()
+            lines = [
+                f"- {timer.name}: {format_duration(timer.seconds_left(now))} left"
+                + (" (paused)" if timer.status == STATUS_PAUSED else "")
+                for timer in timers
+            ]
+            return "Your timers:\n" + "\n".join(lines)
+
+        timer = self._select(timers, timer_data.get('name'), paused={'pause': False, 'resume': True}.get(action))
+        if timer is None:
+            return f"I couldn't find a timer to {action}."
+        # None means the timer finished or changed state before the update landed
+        if action == 'pause':
+            state = await self.engine.pause_timer(timer.id)
+            if state is None:
+                return f"Timer '{timer.name}' already finished or is no longer running."
+            return f"Paused timer '{timer.name}' with {format_duration(state.remaining_seconds or 0)} left."
+        if action == 'resume':
+            state = await self.engine.resume_timer(timer.id)
+            if state is None:
+                return f"Timer '{timer.name}' already finished or is no longer paused."
+            return f"Resumed timer '{timer.name}'."
+        state = await self.engine.cancel_timer(timer.id)
+        if state is None:
+            return f"Timer '{timer.name}' already finished."
+        return f"Cancelled timer '{timer.name}'."
+
+    @staticmethod
+    def _select(timers: List[TimerState], name: Optional[str], paused: Optional[bool]) -> Optional[TimerState]:
+        """The named timer, or the soonest one in the state the action applies to."""
+        if name:
+            wanted = name.lower()
+            return next((timer for timer in timers if timer.name.lower() == wanted), None)
+        return next((timer for timer in timers if paused is None or (timer.status == STATUS_PAUSED) == paused), None)
@@ -1,11 +1,15 @@
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Any
 from dataclasses import dataclass
 import logging
 
 # Import interfaces from published bruno_core package
 from bruno_core.interfaces import AssistantInterface
 from bruno_core.models import Message, AssistantResponse, ConversationContext
+from bruno_core.models.memory import MemoryQuery
 from bruno_core.models.response import ActionResult, ActionStatus
+from app.core.history import count_message_tokens, fit_history
+from app.core.intent_router import Intent, IntentRouter, strip_trigger
+from app.core.llm_scheduler import SchedulerBusyError
 
 logger = logging.getLogger(__name__)
 
@@ -16,18 +20,38 @@ class AgentConfig:
     model: str
     temperature: float = 0.7
     max_tokens: int = 2000
+    context_window: int = 4096  # model context size in tokens (prompt + completion)
+    history_messages: int = 20  # most recent stored messages considered for the prompt
+    memory_top_k: int = 5  # long-term memories recalled per message
+    memory_min_similarity: float = 0.5
     system_prompt: str = "You are Bruno, a helpful AI assistant."
+    busy_message: str = "I'm handling a lot of requests right now. Please try again in a moment."
     llm_provider: str = "ollama"
     base_url: Optional[str] = None
 
 class BrunoAgent(AssistantInterface):
     """Core Bruno AI Agent implementing AssistantInterface."""
-    def __init__(self, config: AgentConfig, llm_client, memory_manager=None, notes_ability=None, timer_ability=None):
+    def __init__(
+        self,
+        config: AgentConfig,
+        llm_client,
+        memory_manager=None,
+        notes_ability=None,
+        timer_ability=None,
+        intent_router: Optional[IntentRouter] = None,
+        history_loader: Optional[Callable[[int, int], Awaitable[List[Dict[str, str]]]]] = None,
+        summary_loader: Optional[Callable[[int], Awaitable[Optional[str]]]] = None
+    ):
         self.config = config
         self.llm_client = llm_client
+        # Async callable (conversation_id, limit) -> recent {"role", "content"} dicts, oldest first
+        self.history_loader = history_loader
+        # Async callable conversation_id -> summary of the turns older than the history window
+        self.summary_loader = summary_loader
         self.memory_manager = memory_manager
         self.notes_ability = notes_ability
         self.timer_ability = timer_ability
+        self.intent_router = intent_router or IntentRouter(llm_client)
         self._abilities: Dict[str, Any] = {}
         self._is_initialized = False
         logger.info(f"Initialized BrunoAgent: {config.name} with {config.llm_provider}/{config.model}")
@@ -48,6 +72,10 @@ class BrunoAgent(AssistantInterface):
     
     async def shutdown(self) -> None:
         """Gracefully shutdown the assistant and cleanup resources."""
+        if hasattr(self.llm_client, 'close'):
+            await self.llm_client.close()
+        if hasattr(self.memory_manager, 'close'):
+            await self.memory_manager.close()
         self._is_initialized = False
         self._abilities.clear()
         logger.info(f"Assistant {self.config.name} shutdown")
@@ -87,31 +115,173 @@ class BrunoAgent(AssistantInterface):
             "version": "1.0.0"
         }
     
+    async def _build_messages(self, message: Message) -> List[Dict[str, str]]:
+        """Assemble the LLM message list: system prompt, summary, budgeted history, then the user message."""
+        system_prompt = self.config.system_prompt
+        messages = [
+            {"role": "system", "content": system_prompt}
+        ]
+        user_id = (message.metadata or {}).get("user_id")
+        memory_context = await self._load_memories(message.content, user_id)
+        if memory_context:
+            messages.append({"role": "system", "content": memory_context})
+        summary = await self._load_summary(message)
+        if summary:
+            messages.append({
+                "role": "system",
+                "content": f"Summary of the earlier conversation:\n{summary}"
+            })
+        current = {
+            "role": "user",
+            "content": message.content
+        }
+        messages.extend(await self._load_history(message, fixed=messages + [current]))
+        messages.append(current)
+        
+        logger.info(f"Total messages being sent to LLM: {len(messages)}")
+        return messages
+
+    async def _load_memories(self, text: str, user_id: Optional[Any]) -> Optional[str]:
+        """Long-term memories relevant to ``text``, formatted as a system message."""
+        if not self.memory_manager or not user_id or not self.config.memory_top_k:
+            return None
+        try:
+            memories = await self.memory_manager.retrieve_memories(MemoryQuery(
+                query_text=text,
+                user_id=str(user_id),
+                limit=self.config.memory_top_k,
+                similarity_threshold=self.config.memory_min_similarity
+            ))
+        except Exception as e:
+            logger.error(f"Error retrieving long-term memories: {e}", exc_info=True)
+            return None
+        if not memories:
+            return None
+        logger.info(f"Injected {len(memories)} long-term memories for user {user_id}")
+        return "What you remember about the user:\n" + "\n".join(f"- {memory.content}" for memory in memories)
+
+    async def _load_summary(self, message: Message) -> Optional[str]:
+        if not self.summary_loader or not message.conversation_id:
+            return None
+        try:
+            return await self.summary_loader(int(message.conversation_id))
+        except Exception as e:
+            logger.error(f"Error loading conversation summary: {e}", exc_info=True)
+            return None
+
+    async def _load_history(self, message: Message, fixed: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Recent conversation turns that fit the prompt's token budget."""
+        if not self.history_loader or not message.conversation_id:
+            return []
+        try:
+            history = await self.history_loader(int(message.conversation_id), self.config.history_messages)
+        except Exception as e:
+            logger.error(f"Error loading conversation history: {e}", exc_info=True)
+            return []
+        # The current message is usually already stored; don't send it twice
+        if history and history[-1]["role"] == "user" and history[-1]["content"] == message.content:
+            history = history[:-1]
+        count_tokens = self.llm_client.get_token_count
+        budget = self.config.context_window - self.config.max_tokens - count_message_tokens(fixed, count_tokens)
+        window = fit_history(history, max(budget, 0), count_tokens)
+        logger.info(f"Conversation history: using {len(window)} of {len(history)} messages within {budget} tokens")
+        return window
+
+    @staticmethod
+    def _request_tags(message: Message) -> Dict[str, Any]:
+        """Per-request hints for the LLM client stack (context reuse, scheduling)."""
+        metadata = message.metadata or {}
+        return {
+            "conversation_id": message.conversation_id,
+            "user_id": metadata.get("user_id"),
+            "is_dm": metadata.get("is_dm", False)
+        }
+
+    async def handle_task_command(
+        self,
+        message: Message,
+        context: Optional[ConversationContext] = None
+    ) -> Optional[AssistantResponse]:
+        """Answer a timer or notes command -- or, in notes mode, a note entry -- without the LLM.
+
+        Abilities are owned by ``context.user.user_id`` (``users.id``); without
+        a context nothing is routed. Returns None for everything else.
+        """
+        user_id = context.user.user_id if context and context.user else None
+        if not user_id:
+            return None
+        user_message = message.content
+        conversation_id = message.conversation_id or "default"
+        metadata = message.metadata or {}
+        intent = await self.intent_router.route(user_message, user_id)
+        ability = {'timer': self.timer_ability, 'notes': self.notes_ability}.get(intent.ability) if intent else None
+        try:
+            if intent is None and self.notes_ability and await self.notes_ability.in_notes_mode(conversation_id):
+                # In notes mode, plain messages become entries of the open note, minus "bruno,"
+                intent = Intent("note_add", {"content": strip_trigger(user_message)}, user_message)
+                ability = self.notes_ability
+            if ability is None:
+                return None
+            ability_response = await ability.handle_intent(
+                intent,
+                user_id=user_id,
+                conversation_id=conversation_id,
+                channel_id=metadata.get("channel_id")
+            )
+        except Exception as e:
+            logger.error(f"Error handling {intent.name if intent else 'task'} command: {e}", exc_info=True)
+            return AssistantResponse(
+                text="Sorry, I couldn't do that right now.",
+                actions=[],
+                success=False,
+                error=str(e),
+                metadata={"intent": intent.name if intent else None}
+            )
+        if not ability_response:
+            return None
+        action_result = ActionResult(
+            action_type=intent.ability,
+            status=ActionStatus.SUCCESS,
+            message=ability_response
+        )
+        return AssistantResponse(
+            text=ability_response,
+            actions=[action_result],
+            success=True,
+            metadata={f"is_{intent.ability}_response": True, "intent": intent.name}
+        )
+
     async def process_message(
         self,
         message: Message,
         context: Optional[ConversationContext] = None
     ) -> AssistantResponse:
-            system_prompt = self.config.system_prompt
-            messages = [
-                {"role": "system", "content": system_prompt}
-            ]
-            user_message = message.content
-            # Add current user message (might be duplicate from history, but we ensure uniqueness above)
-            messages.append({
-                "role": "user",
-                "content": user_message
-            })
-            
-            logger.info(f"Total messages being sent to LLM: {len(messages)}")
+            # Task commands go straight to their ability, without an LLM round-trip
+            task_response = await self.handle_task_command(message, context)
+            if task_response is not None:
+                return task_response
+            messages = await self._build_messages(message)
             
             # Generate response using LLM
-            response = await self.llm_client.generate(
-                messages=messages,
-                model=self.config.model,
-                temperature=self.config.temperature,
-                max_tokens=self.config.max_tokens
-            )
+            usage: Dict[str, int] = {}
+            try:
+                response = await self.llm_client.generate(
+                    messages=messages,
+                    model=self.config.model,
+                    temperature=self.config.temperature,
+                    max_tokens=self.config.max_tokens,
+                    usage=usage,
+                    **self._request_tags(message)
+                )
+            except SchedulerBusyError as e:
+                logger.warning(f"Shedding request: {e}")
+                return AssistantResponse(
+                    text=self.config.busy_message,
+                    actions=[],
+                    success=False,
+                    error=str(e),
+                    metadata={"model": self.config.model, "busy": True}
+                )
             
             # Note: Messages are saved to database by views.py, not here
             # Memory manager only reads from database for conversation history
@@ -120,12 +290,54 @@ class BrunoAgent(AssistantInterface):
                 text=response,
                 actions=[],
                 success=True,
-                metadata={
-                    "model": self.config.model,
-                    "tokens_used": self.get_token_count(response) if hasattr(self, 'get_token_count') else 0
-                }
+                metadata=self.usage_metadata(usage)
             )
 
+    def usage_metadata(self, usage: Dict[str, int]) -> Dict[str, Any]:
+        """Response metadata with the token counts the LLM reported (empty for cached answers)."""
+        return {
+            "model": self.config.model,
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", 0),
+            "tokens_used": usage.get("total_tokens", 0)
+        }
+
+    async def stream_message(
+        self,
+        message: Message,
+        context: Optional[ConversationContext] = None,
+        usage: Optional[Dict[str, int]] = None,
+        outcome: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """Stream the response to a user message as it is generated.
+
+        ``usage``, if given, is filled with the token counts once the stream ends.
+        ``outcome``, if given, receives a task command's full response under
+        ``"response"``, so callers can report its success flag and metadata.
+        Raises ``SchedulerBusyError`` before the first chunk when the request is
+        shed, so callers can tell a busy notice from the model's reply.
+        """
+        task_response = await self.handle_task_command(message, context)
+        if task_response is not None:
+            if outcome is not None:
+                outcome["response"] = task_response
+            yield task_response.text
+            return
+        messages = await self._build_messages(message)
+        try:
+            async for chunk in self.llm_client.stream(
+                messages=messages,
+                model=self.config.model,
+                temperature=self.config.temperature,
+                max_tokens=self.config.max_tokens,
+                usage=usage,
+                **self._request_tags(message)
+            ):
+                yield chunk
+        except SchedulerBusyError as e:
+            logger.warning(f"Shedding request: {e}")
+            raise
+
     async def process_message_2(
         self,
         message: Message,
@@ -149,48 +361,10 @@ class BrunoAgent(AssistantInterface):
             conversation_id = message.conversation_id or "default"
             user_id = context.user.user_id if context and context.user else None
             metadata = message.metadata or {}
-            # Check if this is a timer command first
-            if self.timer_ability and user_id:
-                timer_response = self.timer_ability.handle_timer_command(
-                    user_id=user_id,
-                    conversation_id=conversation_id,
-                    command=user_message
-                )
-                if timer_response:
-                    # This was a timer command - return timer response
-                    action_result = ActionResult(   
-                        action_type="timer",
-                        status=ActionStatus.SUCCESS,
-                        message=timer_response
-                    )
-                    return AssistantResponse(
-                        text=timer_response,
-                        actions=[action_result],
-                        success=True,
-                        metadata={"is_timer_response": True}
-                    )
-            
-            # Check if this is a notes command
-            if self.notes_ability and user_id:
-                notes_response =  self.notes_ability.handle_notes_command(
-                    user_id=user_id,
-                    conversation_id=conversation_id,
-                    command=user_message
-                )
-                if notes_response:
-                    # This was a notes command - return notes response
-                    action_result = ActionResult(
-                        action_type="notes",
-                        status=ActionStatus.SUCCESS,
-                        message=notes_response
-                    )
-                    return AssistantResponse(
-                        text=notes_response,
-                        actions=[action_result],
-                        success=True,
-                        metadata={"is_notes_response": True}
-                    )
-            
+            # Task commands go straight to their ability, without an LLM round-trip
+            task_response = await self.handle_task_command(message, context)
+            if task_response is not None:
+                return task_response
 
             # Get conversation history from memory if available
             conversation_history = []
@@ -224,15 +398,13 @@ class BrunoAgent(AssistantInterface):
             ]
             
             # Inject long-term memories into context if available (skip for task commands)
-            # if user_id and not is_task_command:
-            #     from core.bruno_integration.memory_extraction import memory_extractor
-            #     memory_context = await memory_extractor.format_memories_for_context(user_id, limit=10)
-            #     if memory_context:
-            #         messages.append({
-            #             "role": "system",
-            #             "content": memory_context
-            #         })
-            #         logger.info(f"Injected long-term memories into context for user {user_id}")
+            if user_id and not is_task_command:
+                memory_context = await self._load_memories(user_message, user_id)
+                if memory_context:
+                    messages.append({
+                        "role": "system",
+                        "content": memory_context
+                    })
             
             # Add conversation history (excluding the last user message if it matches current input)
             # This prevents duplicate messages when the current user message is already in history
@@ -254,11 +426,13 @@ class BrunoAgent(AssistantInterface):
             logger.info(f"Total messages being sent to LLM: {len(messages)}")
             
             # Generate response using LLM
+            usage: Dict[str, int] = {}
             response = await self.llm_client.generate(
                 messages=messages,
                 model=self.config.model,
                 temperature=self.config.temperature,
-                max_tokens=self.config.max_tokens
+                max_tokens=self.config.max_tokens,
+                usage=usage
             )
             
             # Note: Messages are saved to database by views.py, not here
@@ -268,10 +442,7 @@ class BrunoAgent(AssistantInterface):
                 text=response,
                 actions=[],
                 success=True,
-                metadata={
-                    "model": self.config.model,
-                    "tokens_used": self.get_token_count(response) if hasattr(self, 'get_token_count') else 0
-                }
+                metadata=self.usage_metadata(usage)
             )
             
         except Exception as e:
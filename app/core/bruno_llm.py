@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional, Any, AsyncIterator
+from typing import Dict, List, Optional, Any, AsyncIterator, Tuple
 import aiohttp
 import logging
 import json
@@ -7,18 +7,77 @@ import json
 from bruno_core.interfaces import LLMInterface
 from bruno_core.models import Message, MessageRole
 from bruno_llm.base import BaseProvider
+from app.core.tokens import TokenCounter
+from app.lib.cache import LRUCache
 
 logger = logging.getLogger(__name__)
 
+def to_message_dicts(messages: List[Any]) -> List[Dict[str, str]]:
+    """Convert Message objects to {"role", "content"} dicts, passing dicts through."""
+    message_dicts = []
+    for msg in messages:
+        if isinstance(msg, Message):
+            message_dicts.append({"role": msg.role.value if hasattr(msg.role, 'value') else str(msg.role), "content": msg.content})
+        else:
+            message_dicts.append(msg)
+    return message_dicts
+
 class OllamaClient(LLMInterface):
     """Client for Ollama LLM API implementing LLMInterface."""
     
-    def __init__(self, base_url: str = "http://localhost:11434", model: str = "mistral:7b"):
+    def __init__(
+        self,
+        base_url: str = "http://localhost:11434",
+        model: str = "mistral:7b",
+        connection_limit: int = 100,
+        connection_limit_per_host: int = 0,
+        keepalive_timeout: float = 60.0,
+        connect_timeout: float = 10.0,
+        request_timeout: float = 300.0,
+        api_mode: str = "chat",
+        keep_alive: Optional[str] = None,
+        reuse_context: bool = False,
+        context_cache_size: int = 1000,
+        num_ctx: Optional[int] = None,
+        token_counter: Optional[TokenCounter] = None
+    ):
         self.base_url = base_url.rstrip('/')
         self.model = model
         self._system_prompt: Optional[str] = None
+        self.connection_limit = connection_limit
+        self.connection_limit_per_host = connection_limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = aiohttp.ClientTimeout(total=request_timeout, connect=connect_timeout)
+        self._session: Optional[aiohttp.ClientSession] = None
+        # "chat" posts structured messages to /api/chat; "generate" flattens them for /api/generate
+        self.api_mode = api_mode
+        self.keep_alive = keep_alive
+        # When enabled, /api/generate's returned context tokens are replayed per conversation
+        self.reuse_context = reuse_context
+        self._contexts = LRUCache(maxsize=context_cache_size)
+        # Context window to request from the server; None keeps the model's default
+        self.num_ctx = num_ctx
+        self.token_counter = token_counter or TokenCounter()
         logger.info(f"Initialized OllamaClient with base_url: {self.base_url}, model: {self.model}")
 
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared keep-alive session, creating it on first use inside the running loop."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.connection_limit,
+                limit_per_host=self.connection_limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    async def close(self) -> None:
+        """Close the pooled HTTP session and its connections."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
     # Implementation of LLMInterface methods
     async def generate(
         self,
@@ -27,24 +86,25 @@ class OllamaClient(LLMInterface):
         max_tokens: Optional[int] = None,
         **kwargs: Any
     ) -> str:
-        """Generate a text response from the LLM."""
+        """Generate a text response from the LLM.
+
+        Pass a dict as ``usage`` to receive the prompt/completion token counts.
+        """
         try:
             # Convert Message objects to dict format if needed
-            message_dicts = []
-            for msg in messages:
-                if isinstance(msg, Message):
-                    message_dicts.append({"role": msg.role.value if hasattr(msg.role, 'value') else str(msg.role), "content": msg.content})
-                else:
-                    message_dicts.append(msg)
+            message_dicts = to_message_dicts(messages)
             
             # Use legacy generate_dict for backward compatibility
             response = await self.generate_dict(
                 messages=message_dicts,
                 model=kwargs.get('model', self.model),
-                temperature=temperature or 0.7,
+                temperature=temperature if temperature is not None else 0.7,
                 max_tokens=max_tokens or 2000,
-                stream=False
+                stream=False,
+                conversation_id=kwargs.get('conversation_id')
             )
+            if kwargs.get('usage') is not None:
+                kwargs['usage'].update(response["usage"])
             return response["content"]
         except Exception as e:
             logger.error(f"Error in generate: {str(e)}", exc_info=True)
@@ -57,57 +117,58 @@ class OllamaClient(LLMInterface):
         max_tokens: Optional[int] = None,
         **kwargs: Any
     ) -> AsyncIterator[str]:
-        """Stream text response from the LLM."""
+        """Stream text response from the LLM.
+
+        Pass a dict as ``usage`` to receive the token counts once the stream ends.
+        """
         try:
             # Convert Message objects to dict format
-            message_dicts = []
-            for msg in messages:
-                if isinstance(msg, Message):
-                    message_dicts.append({"role": msg.role.value if hasattr(msg.role, 'value') else str(msg.role), "content": msg.content})
-                else:
-                    message_dicts.append(msg)
-            
-            prompt = self._messages_to_prompt(message_dicts)
-            
-            payload = {
-                "model": kwargs.get('model', self.model),
-                "prompt": prompt,
-                "temperature": temperature or 0.7,
-                "options": {
-                    "num_predict": max_tokens or 2000,
-                },
-                "stream": True
-            }
+            message_dicts = to_message_dicts(messages)
             
-            url = f"{self.base_url}/api/generate"
+            conversation_id = kwargs.get('conversation_id')
+            url, payload = self._build_request(
+                message_dicts,
+                model=kwargs.get('model', self.model),
+                temperature=temperature if temperature is not None else 0.7,
+                max_tokens=max_tokens or 2000,
+                stream=True,
+                conversation_id=conversation_id
+            )
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=payload) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        raise Exception(f"Ollama API error: {response.status} - {error_text}")
-                    
-                    async for line in response.content:
-                        if line:
-                            data = json.loads(line.decode('utf-8'))
-                            if 'response' in data:
-                                yield data['response']
+            session = self._get_session()
+            async with session.post(url, json=payload) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    raise Exception(f"Ollama API error: {response.status} - {error_text}")
+                
+                parts = []
+                async for line in response.content:
+                    if line:
+                        data = json.loads(line.decode('utf-8'))
+                        content = self._extract_content(data)
+                        if content:
+                            parts.append(content)
+                            yield content
+                        if data.get('done'):
+                            self._remember_context(conversation_id, message_dicts, data)
+                            usage = self._usage(message_dicts, "".join(parts), data)
+                            if kwargs.get('usage') is not None:
+                                kwargs['usage'].update(usage)
         except Exception as e:
             logger.error(f"Error in stream: {str(e)}", exc_info=True)
             raise
     
     def get_token_count(self, text: str) -> int:
-        """Estimate token count for given text."""
-        # Simple approximation: ~4 characters per token
-        return len(text) // 4
+        """Count tokens for the given text (exact with a configured tokenizer, else estimated)."""
+        return self.token_counter.count(text)
     
     async def check_connection(self) -> bool:
         """Check if LLM service is accessible."""
         try:
             url = f"{self.base_url}/api/tags"
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, timeout=aiohttp.ClientTimeout(total=5)) as response:
-                    return response.status == 200
+            session = self._get_session()
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=5)) as response:
+                return response.status == 200
         except Exception as e:
             logger.error(f"Connection check failed: {str(e)}")
             return False
@@ -116,15 +177,15 @@ class OllamaClient(LLMInterface):
         """List available models from the provider."""
         try:
             url = f"{self.base_url}/api/tags"
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status != 200:
-                        raise Exception(f"Failed to list models: {response.status}")
-                    
-                    data = await response.json()
-                    models = [model['name'] for model in data.get('models', [])]
-                    logger.info(f"Available Ollama models: {models}")
-                    return models
+            session = self._get_session()
+            async with session.get(url) as response:
+                if response.status != 200:
+                    raise Exception(f"Failed to list models: {response.status}")
+                
+                data = await response.json()
+                models = [model['name'] for model in data.get('models', [])]
+                logger.info(f"Available Ollama models: {models}")
+                return models
         except Exception as e:
             logger.error(f"Error listing Ollama models: {str(e)}", exc_info=True)
             return []
@@ -144,42 +205,128 @@ class OllamaClient(LLMInterface):
         temperature: float = 0.7,
         max_tokens: int = 2000,
         stream: bool = False,
+        conversation_id: Optional[str] = None,
         **kwargs: Any
     ) -> Dict[str, Any]:
         """Generate response in dictionary format for backward compatibility."""
         try:
-            prompt = self._messages_to_prompt(messages)
-            
-            payload = {
-                "model": model or self.model,
-                "prompt": prompt,
-                "temperature": temperature,
-                "options": {
-                    "num_predict": max_tokens,
-                },
-                "stream": stream
-            }
-            
-            url = f"{self.base_url}/api/generate"
+            url, payload = self._build_request(
+                messages,
+                model=model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=stream,
+                conversation_id=conversation_id
+            )
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=payload) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        raise Exception(f"Ollama API error: {response.status} - {error_text}")
-                    
-                    data = await response.json()
-                    return {
-                        "content": data.get("response", ""),
-                        "model": model or self.model,
-                        "usage": {
-                            "total_tokens": self.get_token_count(data.get("response", ""))
-                        }
-                    }
+            session = self._get_session()
+            async with session.post(url, json=payload) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    raise Exception(f"Ollama API error: {response.status} - {error_text}")
+                
+                data = await response.json()
+                self._remember_context(conversation_id, messages, data)
+                content = self._extract_content(data)
+                return {
+                    "content": content,
+                    "model": model or self.model,
+                    "usage": self._usage(messages, content, data)
+                }
         except Exception as e:
             logger.error(f"Error in generate_dict: {str(e)}", exc_info=True)
             raise
     
+    def _build_request(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        stream: bool,
+        conversation_id: Optional[str] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Return the endpoint URL and JSON payload for a completion request."""
+        payload: Dict[str, Any] = {
+            "model": model or self.model,
+            "options": {
+                "temperature": temperature,
+                "num_predict": max_tokens,
+            },
+            "stream": stream
+        }
+        if self.num_ctx:
+            payload["options"]["num_ctx"] = self.num_ctx
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        
+        if self.reuse_context and conversation_id:
+            cached = self._contexts.get(conversation_id)
+            # Context tokens encode the system, memory and summary messages they were
+            # built with; once any of those changes, the whole prompt is sent again
+            if cached is not None and cached[1] == self._system_key(messages):
+                # Earlier turns are already encoded in the context tokens; send only the new turn
+                payload["prompt"] = self._messages_to_prompt(self._new_turn(messages))
+                payload["context"] = cached[0]
+            else:
+                payload["prompt"] = self._messages_to_prompt(messages)
+            return f"{self.base_url}/api/generate", payload
+        
+        if self.api_mode == "chat":
+            payload["messages"] = [
+                {"role": msg.get("role", "user"), "content": msg.get("content", "")}
+                for msg in messages
+            ]
+            return f"{self.base_url}/api/chat", payload
+        
+        payload["prompt"] = self._messages_to_prompt(messages)
+        return f"{self.base_url}/api/generate", payload
+    
+    @staticmethod
+    def _new_turn(messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Messages after the last assistant reply, i.e. what the stored context has not seen."""
+        start = 0
+        for i, msg in enumerate(messages):
+            if msg.get("role") == "assistant":
+                start = i + 1
+        return [msg for msg in messages[start:] if msg.get("role") != "system"]
+
+    @staticmethod
+    def _system_key(messages: List[Dict[str, str]]) -> int:
+        """Fingerprint of the system messages (prompt, memories, summary) a context was built from."""
+        return hash(tuple(msg.get("content", "") for msg in messages if msg.get("role") == "system"))
+    
+    @staticmethod
+    def _extract_content(data: Dict[str, Any]) -> str:
+        """Pull the generated text out of an /api/chat or /api/generate response."""
+        if "message" in data:
+            return data["message"].get("content", "")
+        return data.get("response", "")
+    
+    def _remember_context(self, conversation_id: Optional[str], messages: List[Dict[str, str]], data: Dict[str, Any]) -> None:
+        if self.reuse_context and conversation_id and data.get("context"):
+            self._contexts.set(conversation_id, (data["context"], self._system_key(messages)))
+    
+    def _usage(self, messages: List[Dict[str, str]], content: str, data: Dict[str, Any]) -> Dict[str, int]:
+        """Token usage from Ollama's prompt_eval_count/eval_count, counted locally if absent."""
+        completion_tokens = data.get("eval_count")
+        if completion_tokens is None:
+            completion_tokens = self.get_token_count(content)
+        else:
+            self.token_counter.calibrate(content, completion_tokens)
+        prompt_tokens = data.get("prompt_eval_count")
+        if prompt_tokens is None:
+            prompt_tokens = sum(self.get_token_count(msg.get("content", "")) for msg in messages)
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+
+    def reset_context(self, conversation_id: str) -> None:
+        """Forget the carried-over context for a conversation."""
+        self._contexts.invalidate(conversation_id)
+    
     def _messages_to_prompt(self, messages: List[Dict[str, str]]) -> str:
         """Convert messages to a single prompt string."""
         prompt_parts = []
@@ -205,4 +352,65 @@ class OllamaClient(LLMInterface):
     
     def get_system_prompt(self) -> Optional[str]:
         """Get the current system prompt."""
-        return self._system_prompt
\ No newline at end of file
+        return self._system_prompt
+
+
+class DelegatingLLMClient(LLMInterface):
+    """Base for LLM clients that wrap another client and forward everything to it.
+
+    Subclasses override the calls they want to intercept (scheduling, caching,
+    routing); anything else, including client-specific helpers such as
+    ``reset_context``, falls through to the wrapped client.
+    """
+    
+    def __init__(self, inner: LLMInterface):
+        self.inner = inner
+    
+    def __getattr__(self, name: str) -> Any:
+        if name == "inner":
+            raise AttributeError(name)
+        return getattr(self.inner, name)
+    
+    async def generate(
+        self,
+        messages: List[Message],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        **kwargs: Any
+    ) -> str:
+        return await self.inner.generate(messages, temperature=temperature, max_tokens=max_tokens, **kwargs)
+    
+    async def stream(
+        self,
+        messages: List[Message],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        **kwargs: Any
+    ) -> AsyncIterator[str]:
+        async for chunk in self.inner.stream(messages, temperature=temperature, max_tokens=max_tokens, **kwargs):
+            yield chunk
+    
+    async def generate_dict(self, messages: List[Dict[str, str]], **kwargs: Any) -> Dict[str, Any]:
+        return await self.inner.generate_dict(messages, **kwargs)
+    
+    def get_token_count(self, text: str) -> int:
+        return self.inner.get_token_count(text)
+    
+    async def check_connection(self) -> bool:
+        return await self.inner.check_connection()
+    
+    async def list_models(self) -> List[str]:
+        return await self.inner.list_models()
+    
+    def get_model_info(self) -> Dict[str, Any]:
+        return self.inner.get_model_info()
+    
+    def set_system_prompt(self, prompt: str) -> None:
+        self.inner.set_system_prompt(prompt)
+    
+    def get_system_prompt(self) -> Optional[str]:
+        return self.inner.get_system_prompt()
+    
+    async def close(self) -> None:
+        if hasattr(self.inner, 'close'):
+            await self.inner.close()
@@ -9,21 +9,61 @@ from bruno_core.models import Message, MessageRole, MessageType
 from bruno_core.models.context import SessionContext, ConversationContext, UserContext
 from bruno_core.models.memory import MemoryEntry, MemoryQuery, MemoryType
 
+from app.lib.cache import CachedMessage, ConversationCache, LRUCache
+
 logger = logging.getLogger(__name__)
 
+_ROLES = {r.value for r in MessageRole}
+
+def _to_role(role_str: str) -> MessageRole:
+    return MessageRole(role_str) if role_str in _ROLES else MessageRole.USER
+
+def _to_cached(message: Message) -> CachedMessage:
+    role = message.role.value if hasattr(message.role, 'value') else str(message.role)
+    return CachedMessage(role, message.content, message.timestamp.timestamp(), message.metadata)
+
+def _from_cached(record: CachedMessage, conversation_id: str) -> Message:
+    return Message(
+        role=_to_role(record.role),
+        content=record.content,
+        message_type=MessageType.TEXT,
+        timestamp=datetime.fromtimestamp(record.timestamp),
+        metadata=dict(record.metadata) if record.metadata else {},
+        conversation_id=conversation_id
+    )
+
 class MemoryManager(MemoryInterface):
     """Manages conversation history and context, implementing MemoryInterface."""
     
-    def __init__(self, db_backend=None):
+    def __init__(
+        self,
+        db_backend=None,
+        vector_store=None,
+        max_messages_per_conversation: int = 200,
+        max_cache_bytes: int = 64 * 1024 * 1024,
+        max_sessions: int = 10000,
+        session_idle_ttl: float = 3600,
+        db_cache_ttl: float = 30
+    ):
         """
         Initialize memory manager.
         
         Args:
             db_backend: Database backend for persistent storage (optional)
+            vector_store: VectorMemoryStore for long-term memories (optional)
+            max_messages_per_conversation: Newest messages kept per cached conversation
+            max_cache_bytes: Memory budget for all cached messages; least recently used conversations go first
+            max_sessions: Upper bound on open sessions
+            session_idle_ttl: Seconds after which an unused session expires
+            db_cache_ttl: Seconds a conversation read from ``db_backend`` is served from
+                the cache before it is re-read, so rows other writers persist show up
         """
         self.db_backend = db_backend
-        self.in_memory_cache: Dict[str, List[Dict]] = {}
-        self._sessions: Dict[str, SessionContext] = {}
+        self.vector_store = vector_store
+        self.in_memory_cache = ConversationCache(max_messages=max_messages_per_conversation, max_bytes=max_cache_bytes)
+        self._sessions = LRUCache(maxsize=max_sessions, ttl=session_idle_ttl, sliding=True)
+        # Conversations read from the database recently enough to trust the cache
+        self._fresh = LRUCache(maxsize=max_sessions, ttl=db_cache_ttl)
         logger.info("Initialized MemoryManager")
     
     # Implementation of MemoryInterface methods
@@ -33,21 +73,14 @@ class MemoryManager(MemoryInterface):
         conversation_id: str
     ) -> None:
         """Store a message in memory."""
-        message_dict = {
-            "role": message.role.value if hasattr(message.role, 'value') else str(message.role),
-            "content": message.content,
-            "timestamp": message.timestamp.isoformat(),
-            "metadata": message.metadata or {}
-        }
-        
-        # Add to in-memory cache
-        if conversation_id not in self.in_memory_cache:
-            self.in_memory_cache[conversation_id] = []
-        self.in_memory_cache[conversation_id].append(message_dict)
-        
-        # Persist to database if backend is available
+        record = _to_cached(message)
         if self.db_backend:
-            await self.db_backend.save_message(conversation_id, message_dict)
+            # Persist first; the cache only ever holds a tail of what is stored
+            await self.db_backend.save_message(conversation_id, message)
+            if conversation_id in self.in_memory_cache:
+                self.in_memory_cache.append(conversation_id, record)
+        else:
+            self.in_memory_cache.append(conversation_id, record)
         
         logger.debug(f"Stored message in conversation {conversation_id}")
     
@@ -56,37 +89,29 @@ class MemoryManager(MemoryInterface):
         conversation_id: str,
         limit: Optional[int] = None
     ) -> List[Message]:
-        """Retrieve messages from a conversation."""
-        # Try to get from database first
-        message_dicts = []
-        if self.db_backend:
-            message_dicts = await self.db_backend.get_messages(conversation_id, limit)
-        
-        # Fallback to in-memory cache
-        if not message_dicts:
-            message_dicts = self.in_memory_cache.get(conversation_id, [])
-            if limit:
-                message_dicts = message_dicts[-limit:]
-        
-        # Convert dicts to Message objects
-        messages = []
-        for msg_dict in message_dicts:
-            try:
-                role_str = msg_dict.get("role", "user")
-                role = MessageRole(role_str) if role_str in [r.value for r in MessageRole] else MessageRole.USER
-                
-                messages.append(Message(
-                    role=role,
-                    content=msg_dict["content"],
-                    message_type=MessageType.TEXT,
-                    timestamp=datetime.fromisoformat(msg_dict.get("timestamp", datetime.utcnow().isoformat())),
-                    metadata=msg_dict.get("metadata", {}),
-                    conversation_id=conversation_id
-                ))
-            except Exception as e:
-                logger.error(f"Error converting message dict to Message: {e}")
-                continue
+        """Retrieve messages from a conversation, reading through the in-memory cache."""
+        cached = self.in_memory_cache.get(conversation_id, limit)
+        if cached is not None and (
+            not self.db_backend
+            or self._fresh.get(conversation_id) and (
+                self.in_memory_cache.is_complete(conversation_id)
+                or (limit and len(cached) >= limit)
+            )
+        ):
+            messages = [_from_cached(record, conversation_id) for record in cached]
+            logger.debug(f"Retrieved {len(messages)} cached messages for conversation {conversation_id}")
+            return messages
+        if not self.db_backend:
+            return []
         
+        messages = await self.db_backend.get_messages(conversation_id, limit)
+        # A short page means we have the whole conversation
+        self.in_memory_cache.replace(
+            conversation_id,
+            [_to_cached(message) for message in messages],
+            complete=not limit or len(messages) < limit
+        )
+        self._fresh.set(conversation_id, True)
         logger.debug(f"Retrieved {len(messages)} messages for conversation {conversation_id}")
         return messages
     
@@ -94,52 +119,70 @@ class MemoryManager(MemoryInterface):
         self,
         query: str,
         user_id: Optional[str] = None,
-        limit: int = 10
+        limit: int = 10,
+        offset: int = 0
     ) -> List[Message]:
-        """Search messages by text query."""
-        # Simple text search implementation
+        """Search messages by text query, best match first."""
+        if self.db_backend and hasattr(self.db_backend, 'search_messages'):
+            rows = await self.db_backend.search_messages(query, user_id=user_id, limit=limit, offset=offset)
+            return [
+                Message(
+                    role=_to_role(row["role"]),
+                    content=row["content"],
+                    message_type=MessageType.TEXT,
+                    timestamp=row["timestamp"],
+                    metadata={"user_id": str(row["user_id"]), "rank": row["rank"], "sequence_number": row["sequence_number"]},
+                    conversation_id=str(row["conversation_id"])
+                )
+                for row in rows
+            ]
+
+        # Without a database, fall back to scanning the in-memory cache
         results = []
+        needle = query.lower()
         for conv_id, messages in self.in_memory_cache.items():
-            for msg_dict in messages:
-                if query.lower() in msg_dict["content"].lower():
-                    try:
-                        role_str = msg_dict.get("role", "user")
-                        role = MessageRole(role_str) if role_str in [r.value for r in MessageRole] else MessageRole.USER
-                        
-                        results.append(Message(
-                            role=role,
-                            content=msg_dict["content"],
-                            message_type=MessageType.TEXT,
-                            timestamp=datetime.fromisoformat(msg_dict.get("timestamp", datetime.utcnow().isoformat())),
-                            metadata=msg_dict.get("metadata", {}),
-                            conversation_id=conv_id
-                        ))
-                    except Exception as e:
-                        logger.error(f"Error converting message: {e}")
+            for record in messages:
+                if needle in record.content.lower():
+                    if user_id is not None and str((record.metadata or {}).get("user_id")) != str(user_id):
                         continue
+                    results.append(_from_cached(record, conv_id))
                 
-                if len(results) >= limit:
+                if len(results) >= offset + limit:
                     break
-            if len(results) >= limit:
+            if len(results) >= offset + limit:
                 break
         
-        return results[:limit]
+        return results[offset:offset + limit]
     
     async def store_memory(self, memory_entry: MemoryEntry) -> None:
         """Store a memory entry (fact, preference, etc.)."""
-        # Simplified implementation - store in cache
-        # In a real implementation, this would go to a vector database
-        logger.info(f"Storing memory entry: {memory_entry.content[:50]}...")
+        if self.vector_store is None:
+            logger.warning("No vector store configured; memory entry not stored")
+            return
+        await self.vector_store.add(memory_entry)
+        logger.info(f"Stored memory entry: {memory_entry.content[:50]}...")
     
     async def retrieve_memories(self, query: MemoryQuery) -> List[MemoryEntry]:
-        """Retrieve memories matching query criteria."""
-        # Simplified implementation
-        logger.info(f"Retrieving memories for user: {query.user_id}")
-        return []
+        """Retrieve memories matching query criteria, most similar first."""
+        if self.vector_store is None:
+            return []
+        matches = await self.vector_store.search(query)
+        memories = []
+        for entry, score in matches:
+            entry.update_access()
+            memories.append(entry)
+        logger.debug(f"Retrieved {len(memories)} memories for user {query.user_id}")
+        return memories
     
     async def delete_memory(self, memory_id: str) -> None:
         """Delete a memory entry."""
-        logger.info(f"Deleting memory: {memory_id}")
+        if self.vector_store is not None and await self.vector_store.delete(memory_id):
+            logger.info(f"Deleted memory: {memory_id}")
+    
+    async def close(self) -> None:
+        """Release resources held by the long-term memory store."""
+        if self.vector_store is not None:
+            await self.vector_store.close()
     
     async def create_session(
         self,
@@ -151,7 +194,7 @@ class MemoryManager(MemoryInterface):
             user_id=user_id,
             metadata=metadata or {}
         )
-        self._sessions[session.session_id] = session
+        self._sessions.set(session.session_id, session)
         logger.info(f"Created session {session.session_id} for user {user_id}")
         return session
     
@@ -161,8 +204,8 @@ class MemoryManager(MemoryInterface):
     
     async def end_session(self, session_id: str) -> None:
         """End a conversation session."""
-        if session_id in self._sessions:
-            del self._sessions[session_id]
+        if self._sessions.get(session_id) is not None:
+            self._sessions.invalidate(session_id)
             logger.info(f"Ended session {session_id}")
     
     async def get_context(
@@ -189,26 +232,23 @@ class MemoryManager(MemoryInterface):
         keep_system_messages: bool = True
     ) -> None:
         """Clear message history for a conversation."""
-        if conversation_id in self.in_memory_cache:
-            if keep_system_messages:
-                self.in_memory_cache[conversation_id] = [
-                    msg for msg in self.in_memory_cache[conversation_id]
-                    if msg["role"] == "system"
-                ]
-            else:
-                del self.in_memory_cache[conversation_id]
+        if keep_system_messages:
+            self.in_memory_cache.retain(conversation_id, lambda record: record.role == "system")
+        else:
+            self.in_memory_cache.discard(conversation_id)
         
         if self.db_backend:
-            await self.db_backend.clear_conversation(conversation_id)
+            await self.db_backend.clear_conversation(conversation_id, keep_system_messages=keep_system_messages)
         
         logger.info(f"Cleared history for conversation {conversation_id}")
     
     async def get_statistics(self, user_id: str) -> Dict[str, Any]:
         """Get memory statistics for a user."""
-        # Simplified implementation
-        total_messages = sum(len(msgs) for msgs in self.in_memory_cache.values())
+        self._sessions.purge_expired()
         return {
-            "total_messages": total_messages,
+            "total_messages": self.in_memory_cache.message_count(),
             "conversations": len(self.in_memory_cache),
-            "memories": 0
+            "cache": self.in_memory_cache.stats(),
+            "sessions": self._sessions.stats(),
+            "memories": self.vector_store.count(user_id) if self.vector_store is not None else 0
         }
\ No newline at end of file
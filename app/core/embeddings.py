@@ -0,0 +1,52 @@
+from typing import List, Optional
+import logging
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+class OllamaEmbedder:
+    """Embeds text with a local Ollama embedding model through /api/embed.
+
+    Any object with an async ``embed(texts) -> List[List[float]]`` method can
+    stand in for it as the embedder of ``VectorMemoryStore``.
+    """
+
+    def __init__(
+        self,
+        base_url: str = "http://localhost:11434",
+        model: str = "nomic-embed-text",
+        keep_alive: Optional[str] = None,
+        request_timeout: float = 60
+    ):
+        self.base_url = base_url.rstrip('/')
+        self.model = model
+        self.keep_alive = keep_alive
+        self.timeout = aiohttp.ClientTimeout(total=request_timeout)
+        self._session: Optional[aiohttp.ClientSession] = None
+        logger.info(f"Initialized OllamaEmbedder with base_url: {self.base_url}, model: {self.model}")
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=self.timeout)
+        return self._session
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of texts in one request."""
+        if not texts:
+            return []
+        payload = {"model": self.model, "input": texts}
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        async with self._get_session().post(f"{self.base_url}/api/embed", json=payload) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise Exception(f"Ollama embed error: {response.status} - {error_text}")
+            data = await response.json()
+        return data["embeddings"]
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
@@ -0,0 +1,34 @@
+from typing import Callable, Dict, List
+
+# Approximate per-message framing cost (role markers, separators) in tokens
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def count_message_tokens(messages: List[Dict[str, str]], count_tokens: Callable[[str], int]) -> int:
+    """Token cost of a message list including per-message framing."""
+    return sum(count_tokens(msg["content"]) + MESSAGE_OVERHEAD_TOKENS for msg in messages)
+
+
+def fit_history(
+    history: List[Dict[str, str]],
+    budget: int,
+    count_tokens: Callable[[str], int]
+) -> List[Dict[str, str]]:
+    """Return the newest turns of ``history`` (oldest first) that fit in ``budget`` tokens.
+
+    Turns are taken from the most recent backwards, so the oldest ones are
+    dropped first. A leading assistant reply whose user turn did not fit is
+    dropped as well so the window never starts mid-exchange.
+    """
+    kept: List[Dict[str, str]] = []
+    used = 0
+    for msg in reversed(history):
+        cost = count_tokens(msg["content"]) + MESSAGE_OVERHEAD_TOKENS
+        if used + cost > budget:
+            break
+        kept.append(msg)
+        used += cost
+    kept.reverse()
+    while kept and kept[0]["role"] == "assistant":
+        kept.pop(0)
+    return kept
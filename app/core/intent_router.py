@@ -0,0 +1,250 @@
+from typing import Any, Dict, Optional, Tuple
+import json
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+_UNIT_SECONDS = {"h": 3600, "m": 60, "s": 1}
+_DURATION = re.compile(r"(\d+)\s*(h|hrs?|hours?|m|mins?|minutes?|s|secs?|seconds?)(?![a-z])", re.IGNORECASE)
+_DUR = r"\d+\s*(?:h|hrs?|hours?|m|mins?|minutes?|s|secs?|seconds?)(?![a-z])"
+# Greedy prefix, so the last keyword wins: "timer for 5 min called tea" -> "tea"
+_NAMED = re.compile(r".*\b(?:called|named|titled|for|timer)\s+[\"']?([a-z][\w ]*?)[\"']?\s*[.!?]?$", re.IGNORECASE)
+_NAME_KEYWORDS = {"called", "named", "titled", "for", "timer", "timers"}
+# "cancel my tea timer" -> "tea"
+_NAME_BEFORE = re.compile(r"\b([a-z]\w*)\s+timer\b", re.IGNORECASE)
+_NOT_NAMES = {"a", "an", "the", "my", "this", "that", "your", "active", "new", "next", "one"}
+_VERB = re.compile(r"\b(pause|hold|resume|unpause|continue|restart|cancel|stop|delete|remove|clear|kill)\b", re.IGNORECASE)
+
+# A verb, then only "all", a determiner and a one-word name before "timer":
+# "cancel my tea timer", "stop all the timers". Must not match
+# "continue the story about the timer" or "stop talking about the timer".
+_TO_TIMER = r"(?:\s+all)?(?:\s+(?:the|my|that|this|those|these|your|our))?(?:\s+[\w'-]+)?\s+timers?\b"
+
+# (intent, ability, pattern), tried in order; the first pattern that matches wins.
+# Every pattern is anchored at the start of the message (after an optional
+# "bruno," and "please"), so chat that merely mentions a timer is left alone.
+INTENT_PATTERNS: Tuple[Tuple[str, str, str], ...] = (
+    ("timer_pause", "timer", rf"(?:pause|hold){_TO_TIMER}"),
+    ("timer_resume", "timer", rf"(?:resume|unpause|continue|restart){_TO_TIMER}"),
+    ("timer_cancel", "timer", rf"(?:cancel|stop|delete|remove|clear|kill){_TO_TIMER}"),
+    ("timer_create", "timer", (
+        rf"(?:(?:set|start|create|make|add)\s+(?:me\s+)?(?:an?\s+|another\s+)?(?:new\s+)?)?"
+        rf"(?:timer\b.*?{_DUR}|{_DUR}(?:\s+[\w'-]+){{0,2}}?\s+timer\b)"
+        rf"|remind\s+me\b.*?\bin\s+{_DUR}"
+    )),
+    ("timer_list", "timer", (
+        rf"(?:list|show(?:\s+me)?|check(?:\s+on)?|any){_TO_TIMER}|(?:what|which)\s+timers\b"
+        r"|(?:what|which|how\s+long)[\w']*(?:\s+[\w'-]+){0,3}?\s+(?:my|the|active|running)(?:\s+[\w'-]+)?\s+timers?\b"
+        r"|(?:my\s+|active\s+)?timers\s*[?.!]*$"
+    )),
+    ("note_create", "notes", r"\s*(?:create|new|start)\s+(?:a\s+)?(?:new\s+)?(?:note|journal)\b"),
+    ("note_add", "notes", r"\s*(?:(?:add|append|write|jot(?:\s+down)?)\s+(?:an?\s+)?(?:note|entry)\b|note\s*:)"),
+    ("note_insert", "notes", r"\s*insert\b(?:\s+(?:an?\s+)?(?:note|entry))?"),
+    ("note_remove", "notes", r"\s*(?:delete|remove|strike)\s+(?:the\s+)?entry\b"),
+    ("note_list", "notes", r"\s*(?:list|show|view|see)\s+(?:all\s+)?(?:my\s+)?notes\b"),
+    ("note_open", "notes", r"\s*(?:open|show|view|read)\s+(?:my\s+|the\s+)?note\b"),
+    ("note_delete", "notes", r"\s*(?:delete|remove)\s+(?:my\s+|the\s+)?note\b"),
+    ("note_exit", "notes", r"\s*(?:exit|close|leave|quit|done\s+with)\s+(?:the\s+)?notes?\b"),
+)
+_ABILITIES = {name: ability for name, ability, _ in INTENT_PATTERNS}
+# "hey bruno," / "please" / "can you" may precede any command
+_GREETING = r"(?:(?:hey|hi|ok|okay)\s+)?"
+_ADDRESS = r"bruno\b[\s,:;!.-]*"
+_POLITE = r"(?:(?:please|pls|can\s+you|could\s+you|would\s+you)\s+)?"
+_LEAD = r"\s*" + _GREETING + "(?:" + _ADDRESS + ")?" + _POLITE
+# Only strips a lead that names bruno, so "hey there" or "please call mom" stay intact
+_TRIGGER = re.compile(r"\s*" + _GREETING + _ADDRESS + _POLITE, re.IGNORECASE)
+# One alternation, one pass: Python's regex engine tries the branches in table order
+_COMBINED = re.compile(
+    _LEAD + "(?:" + "|".join(f"(?P<{name}>{pattern})" for name, _, pattern in INTENT_PATTERNS) + ")",
+    re.IGNORECASE | re.DOTALL
+)
+_ENTRY_ARGUMENT = re.compile(r"(?:(?:at|before)\s+)?(?:entry\s+|position\s+)?#?(\d+)\s*[:,.\-]?\s*(.*)", re.IGNORECASE | re.DOTALL)
+# Messages mentioning none of these are plain chat and skip the LLM fallback
+_TASK_WORDS = re.compile(r"\b(?:timers?|remind(?:er|ers)?|notes?|journal)\b", re.IGNORECASE)
+
+LLM_PROMPT = (
+    "Classify the user's message as one of these commands: "
+    + ", ".join(_ABILITIES)
+    + ", or none if it is not a command. Reply with JSON only, e.g. "
+    '{"intent": "timer_create", "duration_seconds": 300, "name": "tea", "content": null}. '
+    "duration_seconds is the timer length, name the timer or note name, "
+    "content the text of a note entry, index a 1-based entry number; use null when absent."
+)
+
+
+def parse_duration(text: str) -> Optional[int]:
+    """Total seconds in phrases like "5 min", "1h30m" or "2 hours 10 seconds"."""
+    matches = _DURATION.findall(text)
+    if not matches:
+        return None
+    return sum(int(amount) * _UNIT_SECONDS[unit[0].lower()] for amount, unit in matches)
+
+def format_duration(seconds: float) -> str:
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    parts = [f"{hours}h"] if hours else []
+    if minutes:
+        parts.append(f"{minutes}m")
+    if secs or not parts:
+        parts.append(f"{secs}s")
+    return " ".join(parts)
+
+def _timer_name(text: str, exclude: Optional[str] = None) -> Optional[str]:
+    # "for 5 minutes" names nothing
+    text = _DURATION.sub("", text)
+    match = _NAMED.match(text)
+    if match:
+        name = match.group(1).strip()
+        if name.lower() not in _NAME_KEYWORDS and name.lower() != exclude:
+            return name
+    match = _NAME_BEFORE.search(text)
+    if match:
+        name = match.group(1)
+        if name.lower() not in _NOT_NAMES and name.lower() != exclude and not _VERB.fullmatch(name):
+            return name
+    return None
+
+def strip_trigger(text: str) -> str:
+    """"bruno, please buy milk" -> "buy milk"; text not addressed to bruno is returned as is."""
+    match = _TRIGGER.match(text)
+    if match is None:
+        return text
+    return text[match.end():].strip() or text
+
+def _rest(text: str, start: int) -> Optional[str]:
+    rest = text[start:].strip().lstrip(":-").strip()
+    rest = re.sub(r"^(?:called|named|titled)\s+", "", rest, flags=re.IGNORECASE).strip("\"'")
+    return rest or None
+
+def _entry_params(argument: Optional[str]) -> Dict[str, Any]:
+    """"at 3: buy milk" -> index 3, content "buy milk"."""
+    match = _ENTRY_ARGUMENT.match(argument or "")
+    if match is None:
+        return {"index": None, "content": argument}
+    return {"index": int(match.group(1)), "content": match.group(2).strip() or None}
+
+
+class Intent:
+    """A classified task command: ``name`` such as ``"timer_create"`` plus its parameters."""
+
+    __slots__ = ("name", "ability", "params", "text", "source")
+
+    def __init__(self, name: str, params: Dict[str, Any], text: str, source: str = "regex"):
+        self.name = name
+        self.ability = _ABILITIES[name]
+        self.params = params
+        self.text = text
+        self.source = source  # "regex" or "llm"
+
+    @property
+    def action(self) -> str:
+        return self.name.split("_", 1)[1]
+
+    def __repr__(self) -> str:
+        return f"Intent({self.name!r}, {self.params!r}, source={self.source!r})"
+
+
+class IntentRouter:
+    """Routes task commands (timers, notes) to abilities before the LLM sees them.
+
+    ``classify`` runs the precompiled pattern table and takes microseconds.
+    ``route`` can add an LLM parse (``llm_fallback``, off by default) for
+    messages that mention a task word without matching any pattern; it takes
+    an LLM slot before the real reply, so everything else is left to chat.
+    """
+
+    def __init__(self, llm_client=None, llm_fallback: bool = False, max_tokens: int = 100):
+        self.llm_client = llm_client
+        self.llm_fallback = llm_fallback
+        self.max_tokens = max_tokens
+        self.regex_hits = 0
+        self.llm_calls = 0
+
+    def classify(self, text: str) -> Optional[Intent]:
+        """The intent matched by the pattern table, or None."""
+        match = _COMBINED.match(text)
+        if match is None:
+            return None
+        self.regex_hits += 1
+        name = match.lastgroup
+        if _ABILITIES[name] == "timer":
+            command = text[match.start(name):]  # without "hey bruno, please"
+            verb = _VERB.search(command)
+            params = {
+                "name": _timer_name(command, exclude=verb.group(1).lower() if verb else None),
+                "duration_seconds": parse_duration(command) if name == "timer_create" else None,
+            }
+        else:
+            # Notes commands are anchored: whatever follows the command words is the argument
+            argument = _rest(text, match.end())
+            if name == "note_add":
+                params = {"content": argument}
+            elif name in ("note_insert", "note_remove"):
+                params = _entry_params(argument)
+            else:
+                params = {"name": argument}
+        return Intent(name, params, text)
+
+    def is_ambiguous(self, text: str) -> bool:
+        return _TASK_WORDS.search(text) is not None
+
+    async def route(self, text: str, user_id: Optional[str] = None) -> Optional[Intent]:
+        """Classify ``text``, asking the LLM only when the patterns are not conclusive."""
+        intent = self.classify(text)
+        if intent is not None:
+            return intent
+        if self.llm_client is None or not self.llm_fallback or not self.is_ambiguous(text):
+            return None
+        return await self._llm_classify(text, user_id)
+
+    async def _llm_classify(self, text: str, user_id: Optional[str]) -> Optional[Intent]:
+        self.llm_calls += 1
+        try:
+            reply = await self.llm_client.generate(
+                messages=[
+                    {"role": "system", "content": LLM_PROMPT},
+                    {"role": "user", "content": text}
+                ],
+                temperature=0.0,
+                max_tokens=self.max_tokens,
+                user_id=f"intent:{user_id}" if user_id else "intent"
+            )
+        except Exception as e:
+            logger.warning(f"LLM intent parse failed: {e}")
+            return None
+        data = self._parse_reply(reply)
+        name = data.get("intent")
+        if name not in _ABILITIES:
+            return None
+        if name == "timer_create":
+            duration = data.get("duration_seconds")
+            if not isinstance(duration, (int, float)) or duration <= 0:
+                return None
+            params = {"name": data.get("name"), "duration_seconds": int(duration)}
+        elif _ABILITIES[name] == "timer":
+            params = {"name": data.get("name"), "duration_seconds": None}
+        elif name == "note_add":
+            params = {"content": data.get("content")}
+        elif name in ("note_insert", "note_remove"):
+            index = data.get("index")
+            params = {"index": index if isinstance(index, int) else None, "content": data.get("content")}
+        else:
+            params = {"name": data.get("name")}
+        return Intent(name, params, text, source="llm")
+
+    @staticmethod
+    def _parse_reply(reply: str) -> Dict[str, Any]:
+        start, end = reply.find("{"), reply.rfind("}")
+        if start < 0 or end < start:
+            return {}
+        try:
+            data = json.loads(reply[start:end + 1])
+        except json.JSONDecodeError:
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {"regex_hits": self.regex_hits, "llm_calls": self.llm_calls}
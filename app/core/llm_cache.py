@@ -0,0 +1,185 @@
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+import asyncio
+import logging
+import re
+
+from bruno_core.interfaces import LLMInterface
+from bruno_core.models import Message
+
+from app.core.bruno_llm import DelegatingLLMClient, to_message_dicts
+from app.lib.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize(text: str) -> str:
+    return _WHITESPACE.sub(" ", text).strip().casefold()
+
+
+class CoalescingLLMClient(DelegatingLLMClient):
+    """Shares one in-flight request between identical concurrent prompts and caches stable answers.
+
+    Requests are keyed on (model, normalized messages, temperature, max_tokens).
+    While a request is running, identical ones await its result instead of
+    hitting the model again. Answers generated at or below
+    ``cache_max_temperature`` -- or requested with ``cacheable=True`` for
+    system-defined canned prompts -- are kept in a bounded LRU/TTL cache.
+
+    A coalesced ``generate`` call gets the leader's token counts in its
+    ``usage`` dict; a cached answer leaves ``usage`` empty.
+    """
+
+    def __init__(
+        self,
+        inner: LLMInterface,
+        cache_size: int = 512,
+        cache_ttl: Optional[float] = 600.0,
+        cache_max_temperature: float = 0.2
+    ):
+        super().__init__(inner)
+        self.cache_max_temperature = cache_max_temperature
+        self._cache = LRUCache(maxsize=cache_size, ttl=cache_ttl) if cache_size > 0 else None
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.requests = 0
+        self.coalesced = 0
+        logger.info(f"Initialized CoalescingLLMClient with cache_size={cache_size}, cache_ttl={cache_ttl}")
+
+    async def generate(
+        self,
+        messages: List[Message],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        **kwargs: Any
+    ) -> str:
+        cacheable = kwargs.pop('cacheable', False)
+        usage = kwargs.pop('usage', None)
+        key = self._key("generate", messages, temperature, max_tokens, kwargs)
+        return await self._run(
+            key,
+            self._is_cacheable(temperature, cacheable),
+            lambda counts: self.inner.generate(messages, temperature=temperature, max_tokens=max_tokens, usage=counts, **kwargs),
+            usage
+        )
+
+    async def generate_dict(self, messages: List[Dict[str, str]], **kwargs: Any) -> Dict[str, Any]:
+        cacheable = kwargs.pop('cacheable', False)
+        key = self._key("generate_dict", messages, kwargs.get('temperature'), kwargs.get('max_tokens'), kwargs)
+        result = await self._run(
+            key,
+            self._is_cacheable(kwargs.get('temperature'), cacheable),
+            lambda counts: self.inner.generate_dict(messages, **kwargs)
+        )
+        return dict(result)
+
+    async def stream(
+        self,
+        messages: List[Message],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        **kwargs: Any
+    ) -> AsyncIterator[str]:
+        # Streams are not coalesced, but cached answers are replayed and fresh ones recorded
+        cacheable = self._is_cacheable(temperature, kwargs.pop('cacheable', False))
+        key = self._key("generate", messages, temperature, max_tokens, kwargs)
+        if cacheable and key is not None:
+            cached = self._cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+        parts = []
+        async for chunk in self.inner.stream(messages, temperature=temperature, max_tokens=max_tokens, **kwargs):
+            parts.append(chunk)
+            yield chunk
+        if cacheable and key is not None:
+            self._cache.set(key, "".join(parts))
+
+    def get_metrics(self) -> Dict[str, Any]:
+        metrics = {
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+        }
+        if self._cache is not None:
+            metrics["cache"] = self._cache.stats()
+        if hasattr(self.inner, 'get_metrics'):
+            metrics["inner"] = self.inner.get_metrics()
+        return metrics
+
+    def _is_cacheable(self, temperature: Optional[float], cacheable: bool) -> bool:
+        if self._cache is None:
+            return False
+        return cacheable or (temperature is not None and temperature <= self.cache_max_temperature)
+
+    def _key(
+        self,
+        method: str,
+        messages: List[Any],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        kwargs: Dict[str, Any]
+    ) -> Optional[Tuple]:
+        # With context reuse the server-side prompt differs per conversation, so
+        # identical message lists are not interchangeable.
+        if kwargs.get('conversation_id') and getattr(self.inner, 'reuse_context', False):
+            return None
+        normalized = tuple(
+            (msg.get("role", "user"), _normalize(msg.get("content", "")))
+            for msg in to_message_dicts(messages)
+        )
+        return (method, kwargs.get('model'), normalized, temperature, max_tokens)
+
+    async def _run(
+        self,
+        key: Optional[Tuple],
+        cacheable: bool,
+        call: Callable[[Dict[str, int]], Awaitable[Any]],
+        usage: Optional[Dict[str, int]] = None
+    ) -> Any:
+        """Run ``call(counts)`` once per key; ``counts`` receives token usage, copied into every caller's ``usage``."""
+        self.requests += 1
+        if key is None:
+            return await call(usage)
+        if cacheable:
+            cached = self._cache.get(key)
+            if cached is not None:
+                return cached
+
+        while True:
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            try:
+                result, counts = await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise  # this caller was cancelled
+                continue  # the leader was cancelled; retry, possibly as the new leader
+            self.coalesced += 1
+            if usage is not None:
+                usage.update(counts)
+            return result
+
+        future = asyncio.get_running_loop().create_future()
+        # Mark the exception retrieved even if nobody else was waiting on it
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
+        counts: Dict[str, int] = {}
+        try:
+            result = await call(counts)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result((result, counts))
+            if cacheable:
+                self._cache.set(key, result)
+            if usage is not None:
+                usage.update(counts)
+            return result
+        finally:
+            self._inflight.pop(key, None)
@@ -0,0 +1,274 @@
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import logging
+import time
+
+from bruno_core.interfaces import LLMInterface
+from bruno_core.models import Message
+
+from app.lib.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+STRATEGY_LEAST_OUTSTANDING = "least_outstanding"
+STRATEGY_LATENCY = "latency"
+
+
+class _Endpoint:
+    """Routing state for one backend client."""
+
+    __slots__ = ("client", "name", "outstanding", "latency", "failures", "open_until", "requests", "errors")
+
+    def __init__(self, client: LLMInterface):
+        self.client = client
+        self.name = getattr(client, "base_url", client.__class__.__name__)
+        self.outstanding = 0
+        self.latency: Optional[float] = None  # EWMA of successful call durations
+        self.failures = 0                     # consecutive failures
+        self.open_until = 0.0                 # circuit is open until this monotonic time
+        self.requests = 0
+        self.errors = 0
+
+    def is_available(self, now: float) -> bool:
+        return self.open_until <= now
+
+
+class LLMRouter(LLMInterface):
+    """Spreads LLM requests over several backends with health checks and failover.
+
+    Each request goes to the healthy endpoint with the fewest outstanding
+    requests (``least_outstanding``) or the lowest latency-weighted load
+    (``latency``). An endpoint failing ``failure_threshold`` times in a row has
+    its circuit opened for ``cooldown`` seconds; it is then retried by the next
+    request or a background ``check_connection`` probe. Failed calls are
+    retried on the next best endpoint. Conversations stick to the endpoint that
+    served them last while it stays healthy, so its prompt cache stays warm.
+    """
+
+    def __init__(
+        self,
+        clients: List[LLMInterface],
+        strategy: str = STRATEGY_LEAST_OUTSTANDING,
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+        health_check_interval: float = 15.0,
+        affinity_size: int = 10000
+    ):
+        if not clients:
+            raise ValueError("LLMRouter needs at least one client")
+        if strategy not in (STRATEGY_LEAST_OUTSTANDING, STRATEGY_LATENCY):
+            raise ValueError(f"Unsupported routing strategy: {strategy}")
+        self.endpoints = [_Endpoint(client) for client in clients]
+        self.strategy = strategy
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.health_check_interval = health_check_interval
+        self._affinity = LRUCache(maxsize=affinity_size)
+        self._health_task: Optional[asyncio.Task] = None
+        self._system_prompt: Optional[str] = None
+        logger.info(f"Initialized LLMRouter over {[e.name for e in self.endpoints]} using {strategy}")
+
+    @property
+    def model(self) -> str:
+        return getattr(self.endpoints[0].client, "model", None)
+
+    @property
+    def reuse_context(self) -> bool:
+        return any(getattr(e.client, "reuse_context", False) for e in self.endpoints)
+
+    # Implementation of LLMInterface methods
+    async def generate(
+        self,
+        messages: List[Message],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        **kwargs: Any
+    ) -> str:
+        return await self._dispatch(
+            kwargs.get('conversation_id'),
+            lambda client: client.generate(messages, temperature=temperature, max_tokens=max_tokens, **kwargs)
+        )
+
+    async def generate_dict(self, messages: List[Dict[str, str]], **kwargs: Any) -> Dict[str, Any]:
+        return await self._dispatch(
+            kwargs.get('conversation_id'),
+            lambda client: client.generate_dict(messages, **kwargs)
+        )
+
+    async def stream(
+        self,
+        messages: List[Message],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        **kwargs: Any
+    ) -> AsyncIterator[str]:
+        """Stream from the best endpoint, failing over only if nothing was yielded yet."""
+        self._ensure_health_checks()
+        conversation_id = kwargs.get('conversation_id')
+        tried: List[_Endpoint] = []
+        while True:
+            endpoint = self._pick(conversation_id, tried)
+            tried.append(endpoint)
+            yielded = False
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            start = time.monotonic()
+            try:
+                async for chunk in endpoint.client.stream(messages, temperature=temperature, max_tokens=max_tokens, **kwargs):
+                    yielded = True
+                    yield chunk
+            except Exception as e:
+                self._record_failure(endpoint, e)
+                if yielded or len(tried) == len(self.endpoints):
+                    raise
+                continue
+            finally:
+                endpoint.outstanding -= 1
+            self._record_success(endpoint, time.monotonic() - start, conversation_id)
+            return
+
+    def get_token_count(self, text: str) -> int:
+        return self.endpoints[0].client.get_token_count(text)
+
+    async def check_connection(self) -> bool:
+        """True if at least one endpoint is reachable."""
+        await self.probe()
+        now = time.monotonic()
+        return any(e.is_available(now) for e in self.endpoints)
+
+    async def list_models(self) -> List[str]:
+        results = await asyncio.gather(*(e.client.list_models() for e in self.endpoints), return_exceptions=True)
+        models = set()
+        for result in results:
+            if isinstance(result, list):
+                models.update(result)
+        return sorted(models)
+
+    def get_model_info(self) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "provider": "router",
+            "strategy": self.strategy,
+            "endpoints": [e.name for e in self.endpoints]
+        }
+
+    def set_system_prompt(self, prompt: str) -> None:
+        self._system_prompt = prompt
+        for endpoint in self.endpoints:
+            endpoint.client.set_system_prompt(prompt)
+
+    def get_system_prompt(self) -> Optional[str]:
+        return self._system_prompt
+
+    def reset_context(self, conversation_id: str) -> None:
+        for endpoint in self.endpoints:
+            if hasattr(endpoint.client, 'reset_context'):
+                endpoint.client.reset_context(conversation_id)
+
+    async def close(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        for endpoint in self.endpoints:
+            if hasattr(endpoint.client, 'close'):
+                await endpoint.client.close()
+
+    async def probe(self) -> None:
+        """Health-check every endpoint with check_connection and update its circuit.
+
+        A failed check counts toward ``failure_threshold`` like a failed request.
+        """
+        results = await asyncio.gather(*(e.client.check_connection() for e in self.endpoints), return_exceptions=True)
+        for endpoint, ok in zip(self.endpoints, results):
+            if ok is True:
+                if endpoint.failures:
+                    logger.info(f"LLM endpoint {endpoint.name} is healthy again")
+                endpoint.failures = 0
+                endpoint.open_until = 0.0
+            else:
+                endpoint.failures += 1
+                logger.warning(f"LLM endpoint {endpoint.name} failed its health check ({endpoint.failures} in a row): {ok}")
+                if endpoint.failures >= self.failure_threshold:
+                    self._open_circuit(endpoint)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            e.name: {
+                "healthy": e.is_available(now),
+                "outstanding": e.outstanding,
+                "latency_ms": (e.latency or 0.0) * 1000,
+                "requests": e.requests,
+                "errors": e.errors,
+                "consecutive_failures": e.failures,
+            }
+            for e in self.endpoints
+        }
+
+    async def _dispatch(self, conversation_id: Optional[str], call: Callable[[LLMInterface], Awaitable[Any]]) -> Any:
+        self._ensure_health_checks()
+        tried: List[_Endpoint] = []
+        last_error: Optional[Exception] = None
+        while len(tried) < len(self.endpoints):
+            endpoint = self._pick(conversation_id, tried)
+            tried.append(endpoint)
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            start = time.monotonic()
+            try:
+                result = await call(endpoint.client)
+            except Exception as e:
+                self._record_failure(endpoint, e)
+                last_error = e
+                continue
+            finally:
+                endpoint.outstanding -= 1
+            self._record_success(endpoint, time.monotonic() - start, conversation_id)
+            return result
+        raise last_error
+
+    def _pick(self, conversation_id: Optional[str], exclude: List[_Endpoint]) -> _Endpoint:
+        now = time.monotonic()
+        remaining = [e for e in self.endpoints if e not in exclude]
+        # If every circuit is open, still try the untried endpoints rather than fail outright
+        candidates = [e for e in remaining if e.is_available(now)] or remaining
+        if conversation_id:
+            preferred = self._affinity.get(conversation_id)
+            if preferred in candidates:
+                return preferred
+        if self.strategy == STRATEGY_LATENCY:
+            # Unmeasured endpoints score 0 so they get tried early
+            return min(candidates, key=lambda e: (e.latency or 0.0) * (e.outstanding + 1))
+        return min(candidates, key=lambda e: (e.outstanding, e.latency or 0.0))
+
+    def _record_success(self, endpoint: _Endpoint, seconds: float, conversation_id: Optional[str]) -> None:
+        endpoint.failures = 0
+        endpoint.open_until = 0.0
+        endpoint.latency = seconds if endpoint.latency is None else 0.8 * endpoint.latency + 0.2 * seconds
+        if conversation_id:
+            self._affinity.set(conversation_id, endpoint)
+
+    def _record_failure(self, endpoint: _Endpoint, error: Exception) -> None:
+        endpoint.errors += 1
+        endpoint.failures += 1
+        logger.warning(f"LLM endpoint {endpoint.name} failed ({endpoint.failures} in a row): {error}")
+        if endpoint.failures >= self.failure_threshold:
+            self._open_circuit(endpoint)
+
+    def _open_circuit(self, endpoint: _Endpoint) -> None:
+        if endpoint.is_available(time.monotonic()):
+            logger.warning(f"Opening circuit for LLM endpoint {endpoint.name} for {self.cooldown}s")
+        endpoint.failures = max(endpoint.failures, self.failure_threshold)
+        endpoint.open_until = time.monotonic() + self.cooldown
+
+    def _ensure_health_checks(self) -> None:
+        if self.health_check_interval > 0 and self._health_task is None:
+            self._health_task = asyncio.create_task(self._health_loop(), name="llm-router-health")
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            try:
+                await self.probe()
+            except Exception as e:
+                logger.error(f"LLM health probe failed: {e}", exc_info=True)
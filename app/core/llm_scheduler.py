@@ -0,0 +1,189 @@
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+import asyncio
+import logging
+import time
+
+from bruno_core.interfaces import LLMInterface
+from bruno_core.models import Message
+
+from app.core.bruno_llm import DelegatingLLMClient
+
+logger = logging.getLogger(__name__)
+
+# Priority classes, served strictly in this order
+PRIORITY_DM = 0
+PRIORITY_GUILD = 1
+PRIORITY_BACKGROUND = 2  # housekeeping such as summaries; served only when no user is waiting
+
+
+class SchedulerBusyError(Exception):
+    """Raised when a request is shed because its queue wait would exceed the limit."""
+
+
+class LLMScheduler(DelegatingLLMClient):
+    """Caps concurrent LLM requests and queues the rest fairly.
+
+    Waiting requests are grouped by priority class (DMs ahead of guild
+    messages, then background work) and served round-robin across users
+    inside a class, so one chatty user cannot starve everyone else.
+    Requests are rejected with ``SchedulerBusyError`` when the expected
+    wait is over ``max_queue_wait`` seconds, or once they have actually
+    waited that long.
+
+    Callers tag requests with ``user_id``, ``is_dm`` and ``background``
+    keyword arguments, which are consumed here and not forwarded to the
+    wrapped client.
+    """
+
+    def __init__(self, inner: LLMInterface, max_concurrency: int = 2, max_queue_wait: float = 30.0):
+        super().__init__(inner)
+        self.max_concurrency = max_concurrency
+        self.max_queue_wait = max_queue_wait
+        self._active = 0
+        # priority -> user -> waiters, in round-robin order
+        self._queues: Dict[int, "OrderedDict[str, Deque[asyncio.Future]]"] = {
+            PRIORITY_DM: OrderedDict(),
+            PRIORITY_GUILD: OrderedDict(),
+            PRIORITY_BACKGROUND: OrderedDict(),
+        }
+        self._queued = 0
+        self._avg_service_seconds: Optional[float] = None
+        # Metrics
+        self.total_requests = 0
+        self.shed_requests = 0
+        self.max_queue_depth = 0
+        self._total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        logger.info(f"Initialized LLMScheduler with max_concurrency={max_concurrency}, max_queue_wait={max_queue_wait}s")
+
+    async def generate(
+        self,
+        messages: List[Message],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        **kwargs: Any
+    ) -> str:
+        async with self._slot(kwargs):
+            return await self.inner.generate(messages, temperature=temperature, max_tokens=max_tokens, **kwargs)
+
+    async def generate_dict(self, messages: List[Dict[str, str]], **kwargs: Any) -> Dict[str, Any]:
+        async with self._slot(kwargs):
+            return await self.inner.generate_dict(messages, **kwargs)
+
+    async def stream(
+        self,
+        messages: List[Message],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        **kwargs: Any
+    ) -> AsyncIterator[str]:
+        async with self._slot(kwargs):
+            async for chunk in self.inner.stream(messages, temperature=temperature, max_tokens=max_tokens, **kwargs):
+                yield chunk
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Queue depth, concurrency and wait-time metrics."""
+        served = self.total_requests - self.shed_requests
+        return {
+            "active": self._active,
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": self._queued,
+            "max_queue_depth": self.max_queue_depth,
+            "total_requests": self.total_requests,
+            "shed_requests": self.shed_requests,
+            "avg_wait_ms": (self._total_wait_seconds / served * 1000) if served else 0.0,
+            "max_wait_ms": self.max_wait_seconds * 1000,
+            "avg_service_ms": (self._avg_service_seconds or 0.0) * 1000,
+        }
+
+    @asynccontextmanager
+    async def _slot(self, kwargs: Dict[str, Any]):
+        user_key = str(kwargs.pop('user_id', None) or "anonymous")
+        is_dm = kwargs.pop('is_dm', False)
+        if kwargs.pop('background', False):
+            priority = PRIORITY_BACKGROUND
+        else:
+            priority = PRIORITY_DM if is_dm else PRIORITY_GUILD
+        self.total_requests += 1
+
+        start = time.monotonic()
+        await self._acquire(user_key, priority)
+        waited = time.monotonic() - start
+        self._total_wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+        service_start = time.monotonic()
+        try:
+            yield
+        finally:
+            self._record_service_time(time.monotonic() - service_start)
+            self._release()
+
+    async def _acquire(self, user_key: str, priority: int) -> None:
+        if self._active < self.max_concurrency and self._queued == 0:
+            self._active += 1
+            return
+        if self._estimated_wait() > self.max_queue_wait:
+            self.shed_requests += 1
+            raise SchedulerBusyError(f"LLM queue is full ({self._queued} waiting)")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues[priority].setdefault(user_key, deque()).append(waiter)
+        self._queued += 1
+        self.max_queue_depth = max(self.max_queue_depth, self._queued)
+        try:
+            await asyncio.wait_for(waiter, timeout=self.max_queue_wait)
+        except asyncio.TimeoutError:
+            self._remove_waiter(priority, user_key, waiter)
+            self.shed_requests += 1
+            raise SchedulerBusyError(f"Waited more than {self.max_queue_wait}s for an LLM slot")
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # A slot was handed over just as we were cancelled; give it back
+                self._release()
+            else:
+                self._remove_waiter(priority, user_key, waiter)
+            raise
+
+    def _release(self) -> None:
+        self._active -= 1
+        while self._active < self.max_concurrency and self._queued:
+            waiter = self._next_waiter()
+            if not waiter.done():
+                self._active += 1
+                waiter.set_result(None)
+
+    def _next_waiter(self) -> asyncio.Future:
+        for users in self._queues.values():
+            if users:
+                user_key, waiters = next(iter(users.items()))
+                waiter = waiters.popleft()
+                if waiters:
+                    users.move_to_end(user_key)
+                else:
+                    del users[user_key]
+                self._queued -= 1
+                return waiter
+        raise RuntimeError("No waiters queued")
+
+    def _remove_waiter(self, priority: int, user_key: str, waiter: asyncio.Future) -> None:
+        waiters = self._queues[priority].get(user_key)
+        if waiters and waiter in waiters:
+            waiters.remove(waiter)
+            self._queued -= 1
+            if not waiters:
+                del self._queues[priority][user_key]
+
+    def _estimated_wait(self) -> float:
+        if self._avg_service_seconds is None:
+            return 0.0
+        return (self._queued + 1) / self.max_concurrency * self._avg_service_seconds
+
+    def _record_service_time(self, seconds: float) -> None:
+        # Exponentially weighted so the estimate follows model/load changes
+        if self._avg_service_seconds is None:
+            self._avg_service_seconds = seconds
+        else:
+            self._avg_service_seconds = 0.8 * self._avg_service_seconds + 0.2 * seconds
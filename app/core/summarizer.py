@@ -0,0 +1,158 @@
+from typing import Any, Dict, List, Optional
+import asyncio
+import logging
+import time
+
+from bruno_core.interfaces import LLMInterface
+
+from app.db.async_session import async_session_scope
+from app.lib.cache import LRUCache
+from app.lib.memory_store import AsyncMemoryStore
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a chat between a user and Bruno, an AI assistant. "
+    "Update the summary with the new messages. Keep facts about the user, their preferences, "
+    "decisions, open tasks and anything Bruno promised. Drop small talk. "
+    "Reply with the updated summary only, in at most {max_words} words."
+)
+
+
+class ConversationSummarizer:
+    """Folds older conversation turns into a rolling per-conversation summary.
+
+    Conversations are marked with ``schedule()`` as messages arrive. Once one
+    has been quiet for ``idle_seconds``, a background task feeds the messages
+    older than the newest ``keep_recent`` into the LLM, ``batch_size`` at a
+    time, and stores the updated summary on the conversation together with
+    the last sequence number it covers. The prompt then carries the summary
+    plus recent turns instead of the whole history.
+    """
+
+    def __init__(
+        self,
+        llm_client: LLMInterface,
+        session_scope=async_session_scope,
+        keep_recent: int = 20,
+        batch_size: int = 40,
+        min_messages: int = 10,
+        idle_seconds: float = 60.0,
+        max_tokens: int = 300,
+        cache_size: int = 10000
+    ):
+        self.llm_client = llm_client
+        self.keep_recent = keep_recent
+        self.batch_size = batch_size
+        self.min_messages = min_messages
+        self.idle_seconds = idle_seconds
+        self.max_tokens = max_tokens
+        self._session_scope = session_scope
+        self._summaries = LRUCache(maxsize=cache_size)
+        self._last_activity: Dict[int, float] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.summaries_written = 0
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="conversation-summarizer")
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def schedule(self, conversation_id: int) -> None:
+        """Note activity on a conversation; it is summarized after it goes idle."""
+        self._last_activity[conversation_id] = time.monotonic()
+        self._wakeup.set()
+
+    async def get_summary(self, conversation_id: int) -> Optional[str]:
+        """The stored summary for a conversation, cached in memory."""
+        cached = self._summaries.get(conversation_id)
+        if cached is not None:
+            return cached or None
+        async with self._session_scope() as db:
+            summary = await AsyncMemoryStore(db).get_summary(conversation_id)
+        # Cache "no summary" as "" so unsummarized conversations skip the query too
+        self._summaries.set(conversation_id, summary or "")
+        return summary
+
+    async def summarize(self, conversation_id: int) -> bool:
+        """Fold one batch of unsummarized older messages into the summary; True if it changed."""
+        async with self._session_scope() as db:
+            store = AsyncMemoryStore(db)
+            state = await store.get_summary_state(conversation_id)
+            if state is None:
+                return False
+            summary, summarized_through, last_sequence_number = state
+            through = last_sequence_number - self.keep_recent
+            if through - summarized_through < self.min_messages:
+                return False
+            messages = await store.get_messages_between(conversation_id, summarized_through, through, self.batch_size)
+        if not messages:
+            return False
+
+        updated = await self._condense(conversation_id, summary, messages)
+        if not updated:
+            return False
+        async with self._session_scope() as db:
+            saved = await AsyncMemoryStore(db).save_summary(
+                conversation_id, updated, messages[-1]["sequence_number"], summarized_through
+            )
+        if saved:
+            self._summaries.set(conversation_id, updated)
+            self.summaries_written += 1
+            logger.info(f"Summarized conversation {conversation_id} through message {messages[-1]['sequence_number']}")
+        return saved
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._last_activity),
+            "summaries_written": self.summaries_written,
+            "cache": self._summaries.stats(),
+        }
+
+    async def _condense(self, conversation_id: int, summary: Optional[str], messages: List[Dict[str, Any]]) -> str:
+        transcript = "\n".join(f"{msg['role']}: {msg['content']}" for msg in messages)
+        prompt = f"Current summary:\n{summary or '(none yet)'}\n\nNew messages:\n{transcript}"
+        response = await self.llm_client.generate(
+            messages=[
+                {"role": "system", "content": SUMMARY_PROMPT.format(max_words=self.max_tokens * 3 // 4)},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.3,
+            max_tokens=self.max_tokens,
+            # Queued behind all interactive traffic
+            user_id=f"summarizer:{conversation_id}",
+            background=True
+        )
+        return response.strip()
+
+    async def _run(self) -> None:
+        while True:
+            if not self._last_activity:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            now = time.monotonic()
+            due = [cid for cid, seen in self._last_activity.items() if now - seen >= self.idle_seconds]
+            if not due:
+                next_due = min(self._last_activity.values()) + self.idle_seconds
+                await asyncio.sleep(max(next_due - now, 0.1))
+                continue
+            for conversation_id in due:
+                self._last_activity.pop(conversation_id, None)
+                try:
+                    # Work through long backlogs one batch at a time
+                    while await self.summarize(conversation_id):
+                        if conversation_id in self._last_activity:
+                            break  # active again; resume once it is idle
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Error summarizing conversation {conversation_id}: {e}", exc_info=True)
@@ -0,0 +1,316 @@
+from datetime import datetime, timedelta
+from itertools import count
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+import asyncio
+import heapq
+import logging
+
+import app.crud.timer as timer_crud
+from app.db.async_session import async_session_scope
+from app.db.models import Timer
+
+logger = logging.getLogger(__name__)
+
+STATUS_ACTIVE = "active"
+STATUS_PAUSED = "paused"
+STATUS_COMPLETED = "completed"
+STATUS_CANCELLED = "cancelled"
+
+KIND_WARNING = "warning"
+KIND_COMPLETE = "complete"
+
+RETRY_SECONDS = 5
+
+
+class TimerState:
+    """In-memory view of a live (active or paused) timer."""
+
+    __slots__ = (
+        "id", "user_id", "conversation_id", "name", "duration_seconds",
+        "end_time", "status", "remaining_seconds", "warning_sent", "version", "queued"
+    )
+
+    def __init__(self, timer: Timer):
+        self.id = timer.id
+        self.user_id = timer.user_id
+        self.conversation_id = timer.conversation_id
+        self.name = timer.name
+        self.duration_seconds = timer.duration_seconds
+        self.end_time = timer.end_time
+        self.status = timer.status
+        self.remaining_seconds = timer.remaining_seconds
+        self.warning_sent = bool(timer.three_minute_warning_sent)
+        self.version = 0  # bumped to invalidate queued heap entries
+        self.queued = 0   # heap entries carrying the current version
+
+    def seconds_left(self, now: datetime) -> float:
+        if self.status == STATUS_PAUSED:
+            return float(self.remaining_seconds or 0)
+        return max((self.end_time - now).total_seconds(), 0.0)
+
+
+class TimerNotification:
+    """A timer event to deliver: ``kind`` is ``"warning"`` or ``"complete"``."""
+
+    __slots__ = ("kind", "timer")
+
+    def __init__(self, kind: str, timer: TimerState):
+        self.kind = kind
+        self.timer = timer
+
+
+class TimerEngine:
+    """Fires timer warnings and completions from an in-process min-heap.
+
+    Active timers are loaded once by ``start()``; afterwards the database is
+    only written to, never polled. The heap holds ``(deadline, seq, version,
+    timer_id, kind)`` entries and the loop sleeps until the earliest deadline
+    or until a new timer moves it forward. Pausing or cancelling bumps the
+    timer's version, which turns its queued entries stale in O(1); they are
+    skipped when popped and compacted away once they make up most of the heap.
+
+    When deadlines come due, the engine claims every due row with one
+    ``UPDATE ... RETURNING`` per event kind and notifies only for the rows it
+    got back, so several processes sharing the timers table never fire the
+    same notification twice.
+    """
+
+    def __init__(
+        self,
+        notify: Optional[Callable[[TimerNotification], Awaitable[None]]] = None,
+        session_scope=async_session_scope,
+        warning_seconds: int = 180,
+        batch_size: int = 500,
+        clock: Callable[[], datetime] = datetime.now
+    ):
+        self.notify = notify
+        self.warning_seconds = warning_seconds
+        self.batch_size = batch_size
+        self._session_scope = session_scope
+        self._clock = clock
+        self._timers: Dict[int, TimerState] = {}
+        self._by_user: Dict[int, Set[int]] = {}
+        self._heap: List[Tuple[datetime, int, int, int, str]] = []
+        self._seq = count()
+        self._stale = 0
+        self._changed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.fired = 0
+
+    async def start(self) -> None:
+        """Load live timers and start the wakeup loop."""
+        if self._task is not None:
+            return
+        async with self._session_scope() as db:
+            for timer in await timer_crud.get_live_timers_async(db):
+                if timer.id not in self._timers:
+                    self._track(TimerState(timer))
+        logger.info(f"Timer engine loaded {len(self._timers)} live timers")
+        self._task = asyncio.create_task(self._run(), name="timer-engine")
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # ==================== Timer operations ====================
+
+    async def create_timer(
+        self,
+        user_id: int,
+        name: str,
+        duration_seconds: int,
+        conversation_id: Optional[str] = None
+    ) -> TimerState:
+        async with self._session_scope() as db:
+            timer = await timer_crud.create_timer_async(
+                db,
+                user_id,
+                name,
+                duration_seconds,
+                end_time=self._clock() + timedelta(seconds=duration_seconds),
+                conversation_id=conversation_id
+            )
+            state = TimerState(timer)
+        self._track(state)
+        return state
+
+    async def pause_timer(self, timer_id: int) -> Optional[TimerState]:
+        state = self._timers.get(timer_id)
+        if state is None or state.status != STATUS_ACTIVE:
+            return None
+        now = self._clock()
+        remaining = int(round(state.seconds_left(now)))
+        if not await self._save(state, (STATUS_ACTIVE,), status=STATUS_PAUSED, paused_at=now, remaining_seconds=remaining):
+            return None
+        state.remaining_seconds = remaining
+        state.status = STATUS_PAUSED
+        self._invalidate(state)
+        return state
+
+    async def resume_timer(self, timer_id: int) -> Optional[TimerState]:
+        state = self._timers.get(timer_id)
+        if state is None or state.status != STATUS_PAUSED:
+            return None
+        end_time = self._clock() + timedelta(seconds=state.remaining_seconds or 0)
+        if not await self._save(state, (STATUS_PAUSED,), status=STATUS_ACTIVE, end_time=end_time, paused_at=None, remaining_seconds=None):
+            return None
+        state.end_time = end_time
+        state.status = STATUS_ACTIVE
+        state.remaining_seconds = None
+        self._schedule(state)
+        return state
+
+    async def cancel_timer(self, timer_id: int) -> Optional[TimerState]:
+        state = self._timers.get(timer_id)
+        if state is None:
+            return None
+        if not await self._save(state, timer_crud.LIVE_STATUSES, status=STATUS_CANCELLED):
+            return None
+        self._untrack(state)
+        state.status = STATUS_CANCELLED
+        return state
+
+    def get_timers(self, user_id: int) -> List[TimerState]:
+        """A user's live timers, soonest first."""
+        timers = [self._timers[timer_id] for timer_id in self._by_user.get(user_id, ())]
+        now = self._clock()
+        return sorted(timers, key=lambda state: state.seconds_left(now))
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "timers": len(self._timers),
+            "heap_size": len(self._heap),
+            "stale_entries": self._stale,
+            "fired": self.fired,
+        }
+
+    # ==================== Heap management ====================
+
+    def _track(self, state: TimerState) -> None:
+        self._timers[state.id] = state
+        self._by_user.setdefault(state.user_id, set()).add(state.id)
+        if state.status == STATUS_ACTIVE:
+            self._schedule(state)
+
+    def _untrack(self, state: TimerState) -> None:
+        self._invalidate(state)
+        self._timers.pop(state.id, None)
+        user_timers = self._by_user.get(state.user_id)
+        if user_timers is not None:
+            user_timers.discard(state.id)
+            if not user_timers:
+                del self._by_user[state.user_id]
+
+    def _schedule(self, state: TimerState) -> None:
+        """Queue the timer's pending events; O(log n) per push."""
+        warn_at = state.end_time - timedelta(seconds=self.warning_seconds)
+        # Short timers and timers that already ran out while we were down get no warning
+        if not state.warning_sent and state.duration_seconds > self.warning_seconds and warn_at > self._clock():
+            self._push(warn_at, state, KIND_WARNING)
+        self._push(state.end_time, state, KIND_COMPLETE)
+        self._changed.set()
+
+    def _push(self, when: datetime, state: TimerState, kind: str) -> None:
+        heapq.heappush(self._heap, (when, next(self._seq), state.version, state.id, kind))
+        state.queued += 1
+
+    def _invalidate(self, state: TimerState) -> None:
+        state.version += 1
+        self._stale += state.queued
+        state.queued = 0
+        if self._stale > 64 and self._stale > len(self._heap) // 2:
+            self._heap = [entry for entry in self._heap if self._is_current(entry)]
+            heapq.heapify(self._heap)
+            self._stale = 0
+
+    def _is_current(self, entry: Tuple[datetime, int, int, int, str]) -> bool:
+        state = self._timers.get(entry[3])
+        return state is not None and state.version == entry[2]
+
+    # ==================== Wakeup loop ====================
+
+    async def _run(self) -> None:
+        while True:
+            self._changed.clear()
+            if not self._heap:
+                await self._changed.wait()
+                continue
+            delay = (self._heap[0][0] - self._clock()).total_seconds()
+            if delay > 0:
+                try:
+                    # Woken early when a new, sooner deadline is queued
+                    await asyncio.wait_for(self._changed.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            now = self._clock()
+            due = []
+            while self._heap and self._heap[0][0] <= now:
+                entry = heapq.heappop(self._heap)
+                if not self._is_current(entry):
+                    self._stale -= 1
+                    continue
+                self._timers[entry[3]].queued -= 1
+                due.append(entry)
+            try:
+                await self._fire_due(now, due)
+            except Exception as e:
+                logger.error(f"Error firing due timers: {e}", exc_info=True)
+                # Try again shortly rather than dropping the events
+                for entry in due:
+                    if self._is_current(entry):
+                        self._push(now + timedelta(seconds=RETRY_SECONDS), self._timers[entry[3]], entry[4])
+
+    async def _fire_due(self, now: datetime, due: List[Tuple[datetime, int, int, int, str]]) -> None:
+        """Claim everything due by ``now`` in bulk, then notify for the claimed rows."""
+        notifications = []
+        while True:
+            async with self._session_scope() as db:
+                warned = await timer_crud.claim_due_warnings_async(db, now, self.warning_seconds, self.batch_size)
+                completed = await timer_crud.claim_due_completions_async(db, now, self.batch_size)
+            notifications.extend(self._claimed(KIND_WARNING, timer) for timer in warned)
+            notifications.extend(self._claimed(KIND_COMPLETE, timer) for timer in completed)
+            if len(warned) < self.batch_size and len(completed) < self.batch_size:
+                break
+        # Due entries we did not get back were claimed by another process, or changed state
+        for entry in due:
+            if self._is_current(entry):
+                state = self._timers[entry[3]]
+                if entry[4] == KIND_WARNING:
+                    state.warning_sent = True
+                else:
+                    self._untrack(state)
+        self.fired += len(notifications)
+        if self.notify is None:
+            return
+        for notification in notifications:
+            try:
+                await self.notify(notification)
+            except Exception as e:
+                logger.error(f"Error notifying for timer {notification.timer.id}: {e}", exc_info=True)
+
+    def _claimed(self, kind: str, timer: Timer) -> TimerNotification:
+        state = self._timers.get(timer.id)
+        if state is None:
+            # Set up by another process
+            state = TimerState(timer)
+        elif kind == KIND_WARNING:
+            state.warning_sent = True
+        else:
+            self._untrack(state)
+        if kind == KIND_COMPLETE:
+            state.status = STATUS_COMPLETED
+        return TimerNotification(kind, state)
+
+    async def _save(self, state: TimerState, from_statuses: Tuple[str, ...], **values: Any) -> bool:
+        """Persist a user-initiated change; False (and the timer is dropped) if it already finished."""
+        async with self._session_scope() as db:
+            saved = await timer_crud.update_timer_async(db, state.id, from_statuses, **values)
+        if not saved:
+            self._untrack(state)
+        return saved
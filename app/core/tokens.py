@@ -0,0 +1,77 @@
+from typing import Any, Dict, Optional
+import logging
+
+from app.lib.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# Calibration keeps the fallback ratio within plausible bounds for BPE tokenizers
+MIN_CHARS_PER_TOKEN = 1.5
+MAX_CHARS_PER_TOKEN = 8.0
+
+
+class TokenCounter:
+    """Counts tokens with the model's tokenizer, or estimates them when none is available.
+
+    With ``tokenizer_path`` pointing at a Hugging Face ``tokenizer.json`` (and
+    the ``tokenizers`` package installed) counts are exact and memoized, since
+    the same system prompt and stored messages are counted on every request.
+    Otherwise counts are estimated from a characters-per-token ratio that is
+    recalibrated from the token counts Ollama reports for each completion.
+    """
+
+    def __init__(
+        self,
+        tokenizer_path: Optional[str] = None,
+        chars_per_token: float = 4.0,
+        cache_size: int = 4096
+    ):
+        self.chars_per_token = chars_per_token
+        self._tokenizer = self._load_tokenizer(tokenizer_path) if tokenizer_path else None
+        self._cache = LRUCache(maxsize=cache_size)
+
+    @property
+    def exact(self) -> bool:
+        """True if counts come from the real tokenizer."""
+        return self._tokenizer is not None
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._tokenizer is None:
+            # Cheaper than a cache lookup, and stays in step with calibration
+            return max(1, round(len(text) / self.chars_per_token))
+        count = self._cache.get(text)
+        if count is None:
+            count = len(self._tokenizer.encode(text, add_special_tokens=False).ids)
+            self._cache.set(text, count)
+        return count
+
+    def calibrate(self, text: str, tokens: Optional[int]) -> None:
+        """Adjust the fallback ratio from a server-reported token count for ``text``."""
+        if self._tokenizer is not None or not tokens or len(text) < 16:
+            return
+        observed = min(max(len(text) / tokens, MIN_CHARS_PER_TOKEN), MAX_CHARS_PER_TOKEN)
+        self.chars_per_token = 0.9 * self.chars_per_token + 0.1 * observed
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "exact": self.exact,
+            "chars_per_token": round(self.chars_per_token, 3),
+            "cache": self._cache.stats(),
+        }
+
+    @staticmethod
+    def _load_tokenizer(path: str):
+        try:
+            from tokenizers import Tokenizer
+        except ImportError:
+            logger.warning("LLM_TOKENIZER_PATH is set but the 'tokenizers' package is not installed; estimating token counts")
+            return None
+        try:
+            tokenizer = Tokenizer.from_file(path)
+        except Exception as e:
+            logger.warning(f"Could not load tokenizer from {path}: {e}; estimating token counts")
+            return None
+        logger.info(f"Loaded tokenizer from {path}")
+        return tokenizer
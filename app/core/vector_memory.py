@@ -0,0 +1,272 @@
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import json
+import logging
+import os
+
+import numpy as np
+from bruno_core.models.memory import MemoryEntry, MemoryQuery
+
+logger = logging.getLogger(__name__)
+
+VECTORS_FILE = "vectors.f32"
+ENTRIES_FILE = "entries.jsonl"
+
+
+class VectorMemoryStore:
+    """In-process vector index of long-term memories with append-only disk persistence.
+
+    Embeddings are L2-normalized and kept in one contiguous float32 matrix, so
+    a top-k lookup is a single matrix-vector product plus a partial sort --
+    milliseconds even with hundreds of thousands of entries.
+
+    On disk, ``path`` holds ``vectors.f32`` (raw rows, appended) and
+    ``entries.jsonl`` (one add/delete record per line, appended). Deleted rows
+    are compacted away when the store is loaded.
+    """
+
+    def __init__(self, embedder, path: Optional[str] = None, compact_ratio: float = 0.25):
+        self.embedder = embedder
+        self.path = path
+        self.compact_ratio = compact_ratio
+        self._clear()
+        self._loaded = False
+        self._lock = asyncio.Lock()
+
+    def _clear(self) -> None:
+        self._vectors: Optional[np.ndarray] = None  # (capacity, dim)
+        self._users = np.empty(0, dtype=np.int32)    # user code per row, -1 once deleted
+        self._entries: List[Optional[MemoryEntry]] = []
+        self._rows: Dict[str, int] = {}
+        self._user_codes: Dict[str, int] = {}
+        self._user_counts: Dict[str, int] = {}
+        self._size = 0
+        self._deleted = 0
+
+    def __len__(self) -> int:
+        return self._size - self._deleted
+
+    def count(self, user_id: str) -> int:
+        return self._user_counts.get(user_id, 0)
+
+    async def add(self, entry: MemoryEntry) -> None:
+        """Index a memory, embedding its content unless it already carries an embedding."""
+        embedding = entry.metadata.embedding
+        if embedding is None:
+            embedding = (await self.embedder.embed([entry.content]))[0]
+        vector = self._normalize(embedding)
+        async with self._lock:
+            await self._ensure_loaded()
+            if self._vectors is not None and vector.shape[0] != self._vectors.shape[1]:
+                raise ValueError(f"Embedding has dimension {vector.shape[0]}, index has {self._vectors.shape[1]}")
+            key = str(entry.id)
+            if key in self._rows:
+                self._remove_row(self._rows[key])
+                await self._append_record({"op": "delete", "id": key})
+            row = self._append_row(entry, vector)
+            await self._append_record(self._add_record(entry), vector)
+        logger.debug(f"Indexed memory {key} at row {row}")
+
+    async def delete(self, memory_id: str) -> bool:
+        async with self._lock:
+            await self._ensure_loaded()
+            row = self._rows.get(str(memory_id))
+            if row is None:
+                return False
+            self._remove_row(row)
+            await self._append_record({"op": "delete", "id": str(memory_id)})
+        return True
+
+    async def search(self, query: MemoryQuery) -> List[Tuple[MemoryEntry, float]]:
+        """The best matches for ``query.query_text`` among the user's memories, best first."""
+        async with self._lock:
+            await self._ensure_loaded()
+        code = self._user_codes.get(query.user_id)
+        if code is None or not self.count(query.user_id) or not query.query_text:
+            return []
+        q = self._normalize((await self.embedder.embed([query.query_text]))[0])
+        if q.shape[0] != self._vectors.shape[1]:
+            raise ValueError(f"Query embedding has dimension {q.shape[0]}, index has {self._vectors.shape[1]}")
+
+        # One pass over the whole matrix beats gathering the user's rows into a copy
+        scores = self._vectors[:self._size] @ q
+        scores[self._users[:self._size] != code] = -np.inf
+        # Partial sort first; fall back to a full sort only if filters reject too many
+        k = min(self.count(query.user_id), max(query.limit * 4, 64))
+        results = self._collect(scores, self._top(scores, k), query)
+        if len(results) < query.limit and k < self.count(query.user_id):
+            results = self._collect(scores, np.argsort(-scores), query)
+        return results
+
+    async def close(self) -> None:
+        if hasattr(self.embedder, 'close'):
+            await self.embedder.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self),
+            "deleted_rows": self._deleted,
+            "users": len(self._user_counts),
+            "dimension": None if self._vectors is None else self._vectors.shape[1],
+        }
+
+    # ==================== Index internals ====================
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    @staticmethod
+    def _top(scores: np.ndarray, k: int) -> np.ndarray:
+        if k >= len(scores):
+            return np.argsort(-scores)
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top])]
+
+    def _collect(self, scores: np.ndarray, order: np.ndarray, query: MemoryQuery) -> List[Tuple[MemoryEntry, float]]:
+        results = []
+        for row in order:
+            score = float(scores[row])
+            if score < query.similarity_threshold:
+                break  # also stops at other users' rows, which score -inf
+            entry = self._entries[row]
+            if self._matches(entry, query):
+                results.append((entry, score))
+                if len(results) == query.limit:
+                    break
+        return results
+
+    @staticmethod
+    def _matches(entry: MemoryEntry, query: MemoryQuery) -> bool:
+        metadata = entry.metadata
+        if query.memory_types and entry.memory_type not in query.memory_types:
+            return False
+        if query.categories and metadata.category not in query.categories:
+            return False
+        if query.tags and not set(query.tags) & set(metadata.tags):
+            return False
+        if metadata.confidence < query.min_confidence or metadata.importance < query.min_importance:
+            return False
+        return query.include_expired or not entry.is_expired()
+
+    def _append_row(self, entry: MemoryEntry, vector: np.ndarray) -> int:
+        if self._vectors is None:
+            self._vectors = np.empty((1024, vector.shape[0]), dtype=np.float32)
+            self._users = np.empty(1024, dtype=np.int32)
+        elif vector.shape[0] != self._vectors.shape[1]:
+            raise ValueError(f"Embedding has dimension {vector.shape[0]}, index has {self._vectors.shape[1]}")
+        if self._size == len(self._vectors):
+            # Amortized O(1) appends
+            self._vectors = np.concatenate([self._vectors, np.empty_like(self._vectors)])
+            self._users = np.concatenate([self._users, np.empty_like(self._users)])
+        row = self._size
+        self._vectors[row] = vector
+        self._users[row] = self._user_codes.setdefault(entry.user_id, len(self._user_codes))
+        # The vector lives in the matrix; don't keep a second copy on the entry
+        entry.metadata.embedding = None
+        self._entries.append(entry)
+        self._rows[str(entry.id)] = row
+        self._user_counts[entry.user_id] = self._user_counts.get(entry.user_id, 0) + 1
+        self._size += 1
+        return row
+
+    def _remove_row(self, row: int) -> None:
+        entry = self._entries[row]
+        self._entries[row] = None
+        self._users[row] = -1
+        del self._rows[str(entry.id)]
+        self._user_counts[entry.user_id] -= 1
+        if not self._user_counts[entry.user_id]:
+            del self._user_counts[entry.user_id]
+        self._deleted += 1
+
+    # ==================== Persistence ====================
+
+    def _add_record(self, entry: MemoryEntry) -> Dict[str, Any]:
+        return {
+            "op": "add",
+            "dim": self._vectors.shape[1],
+            "entry": entry.model_dump(mode="json", exclude={"metadata": {"embedding"}})
+        }
+
+    async def _append_record(self, record: Dict[str, Any], vector: Optional[np.ndarray] = None) -> None:
+        if self.path:
+            await asyncio.to_thread(self._write_record, record, vector)
+
+    def _write_record(self, record: Dict[str, Any], vector: Optional[np.ndarray]) -> None:
+        # Vector first: on a crash, rows without an entry line are dropped at load time
+        if vector is not None:
+            with open(os.path.join(self.path, VECTORS_FILE), "ab") as f:
+                f.write(vector.tobytes())
+        with open(os.path.join(self.path, ENTRIES_FILE), "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+    async def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        try:
+            await self._load()
+        except BaseException:
+            # Start from scratch on the next call rather than serve a partial index
+            self._clear()
+            raise
+        self._loaded = True
+
+    async def _load(self) -> None:
+        if not self.path:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        records, vectors = await asyncio.to_thread(self._read_files)
+        added = 0
+        for record in records:
+            if record["op"] == "add":
+                if added == len(vectors):
+                    break  # entry line without its vector
+                entry = MemoryEntry.model_validate(record["entry"])
+                key = str(entry.id)
+                if key in self._rows:
+                    self._remove_row(self._rows[key])
+                self._append_row(entry, vectors[added])
+                added += 1
+            elif record["op"] == "delete" and record["id"] in self._rows:
+                self._remove_row(self._rows[record["id"]])
+        logger.info(f"Loaded {len(self)} memories from {self.path}")
+        # Rewrite if mostly tombstones, or if an interrupted write left the files out of step
+        if self._deleted > self.compact_ratio * self._size or added != len(vectors):
+            await asyncio.to_thread(self._compact)
+
+    def _read_files(self):
+        entries_path = os.path.join(self.path, ENTRIES_FILE)
+        vectors_path = os.path.join(self.path, VECTORS_FILE)
+        records = []
+        if os.path.exists(entries_path):
+            with open(entries_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        logger.warning(f"Skipping corrupt memory record in {entries_path}")
+        vectors = np.empty((0, 0), dtype=np.float32)
+        first_add = next((record for record in records if record["op"] == "add"), None)
+        if first_add is not None and os.path.exists(vectors_path):
+            dim = first_add["dim"]
+            raw = np.fromfile(vectors_path, dtype=np.float32)
+            vectors = raw[:len(raw) // dim * dim].reshape(-1, dim)
+        return records, vectors
+
+    def _compact(self) -> None:
+        """Rewrite both files with only the live rows."""
+        live = [row for row in range(self._size) if self._entries[row] is not None]
+        tmp_vectors = os.path.join(self.path, VECTORS_FILE + ".tmp")
+        tmp_entries = os.path.join(self.path, ENTRIES_FILE + ".tmp")
+        with open(tmp_vectors, "wb") as f:
+            if live:
+                f.write(self._vectors[live].tobytes())
+        with open(tmp_entries, "w", encoding="utf-8") as f:
+            for row in live:
+                f.write(json.dumps(self._add_record(self._entries[row])) + "\n")
+        os.replace(tmp_vectors, os.path.join(self.path, VECTORS_FILE))
+        os.replace(tmp_entries, os.path.join(self.path, ENTRIES_FILE))
+        logger.info(f"Compacted memory index at {self.path} to {len(live)} rows")
@@ -0,0 +1,209 @@
+from typing import List, Optional, Sequence, Tuple
+from sqlalchemy import delete, func, insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from app.db.models import Note, NoteEntry
+
+# Entries are spaced this far apart, so an insert between two neighbours
+# takes the midpoint instead of shifting every later row
+POSITION_GAP = 1024
+
+# ==================== Async Operations ====================
+
+async def create_note_async(db: AsyncSession, user_id: int, name: str = 'Untitled'):
+    note = Note(user_id=user_id, name=name)
+    db.add(note)
+    await db.flush()
+    return note
+
+async def get_note_async(db: AsyncSession, note_id: int, with_entries: bool = False):
+    """The note, optionally with all its entries (in order) loaded by one extra SELECT ... IN query.
+
+    Loading every entry is for full exports; to show a note use ``get_latest_entries_async``.
+    """
+    stmt = select(Note).where(Note.id == note_id)
+    if with_entries:
+        stmt = stmt.options(selectinload(Note.entries))
+    result = await db.execute(stmt)
+    return result.scalars().first()
+
+async def get_note_by_name_async(db: AsyncSession, user_id: int, name: str, with_entries: bool = False):
+    """The user's most recently updated note with this name, ignoring case."""
+    stmt = (
+        select(Note)
+        .where(Note.user_id == user_id, func.lower(Note.name) == name.lower())
+        .order_by(Note.updated_at.desc(), Note.id.desc())
+        .limit(1)
+    )
+    if with_entries:
+        stmt = stmt.options(selectinload(Note.entries))
+    result = await db.execute(stmt)
+    return result.scalars().first()
+
+async def get_latest_entries_async(db: AsyncSession, note_id: int, limit: int) -> Tuple[List[NoteEntry], int]:
+    """The note's last ``limit`` entries in order, plus its total entry count; older entries are not loaded."""
+    total = await db.scalar(select(func.count()).select_from(NoteEntry).where(NoteEntry.note_id == note_id))
+    result = await db.execute(
+        select(NoteEntry)
+        .where(NoteEntry.note_id == note_id)
+        .order_by(NoteEntry.position.desc(), NoteEntry.id.desc())
+        .limit(limit)
+    )
+    return list(reversed(result.scalars().all())), total
+
+async def get_latest_note_async(db: AsyncSession, user_id: int):
+    result = await db.execute(
+        select(Note)
+        .where(Note.user_id == user_id)
+        .order_by(Note.updated_at.desc(), Note.id.desc())
+        .limit(1)
+    )
+    return result.scalars().first()
+
+async def get_notes_with_counts_async(db: AsyncSession, user_id: int) -> List[Tuple[Note, int]]:
+    """The user's notes, most recently updated first, each with its entry count; entries are not loaded."""
+    counts = (
+        select(NoteEntry.note_id, func.count().label("entries"))
+        .join(Note, Note.id == NoteEntry.note_id)
+        .where(Note.user_id == user_id)
+        .group_by(NoteEntry.note_id)
+        .subquery()
+    )
+    result = await db.execute(
+        select(Note, func.coalesce(counts.c.entries, 0))
+        .outerjoin(counts, counts.c.note_id == Note.id)
+        .where(Note.user_id == user_id)
+        .order_by(Note.updated_at.desc(), Note.id.desc())
+    )
+    return [(note, count) for note, count in result.all()]
+
+async def _touch_note(db: AsyncSession, note_id: int) -> None:
+    await db.execute(
+        update(Note)
+        .where(Note.id == note_id)
+        .values(updated_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+
+async def add_entry_async(db: AsyncSession, note_id: int, content: str) -> int:
+    """Append an entry with one INSERT ... SELECT, without reading or rewriting existing positions.
+
+    Returns the new entry's id.
+    """
+    next_position = (
+        select(literal(note_id), literal(content), func.coalesce(func.max(NoteEntry.position), 0) + POSITION_GAP)
+        .where(NoteEntry.note_id == note_id)
+    )
+    result = await db.execute(
+        insert(NoteEntry)
+        .from_select(["note_id", "content", "position"], next_position)
+        .returning(NoteEntry.id)
+    )
+    entry_id = result.scalar_one()
+    await _touch_note(db, note_id)
+    return entry_id
+
+async def add_entries_async(db: AsyncSession, note_id: int, contents: Sequence[str]) -> int:
+    """Append many entries with one multi-row INSERT; returns how many were added."""
+    if not contents:
+        return 0
+    last = await db.scalar(select(func.max(NoteEntry.position)).where(NoteEntry.note_id == note_id))
+    base = last or 0
+    await db.execute(
+        insert(NoteEntry),
+        [
+            {"note_id": note_id, "content": content, "position": base + POSITION_GAP * i}
+            for i, content in enumerate(contents, start=1)
+        ]
+    )
+    await _touch_note(db, note_id)
+    return len(contents)
+
+async def _respace(db: AsyncSession, note_id: int) -> None:
+    """Spread a note's positions evenly again; only needed once a gap is used up."""
+    result = await db.execute(
+        select(NoteEntry.id)
+        .where(NoteEntry.note_id == note_id)
+        .order_by(NoteEntry.position, NoteEntry.id)
+    )
+    await db.execute(
+        update(NoteEntry),
+        [{"id": entry_id, "position": POSITION_GAP * i} for i, entry_id in enumerate(result.scalars(), start=1)]
+    )
+
+async def _neighbour_positions(db: AsyncSession, note_id: int, index: int) -> List[int]:
+    result = await db.execute(
+        select(NoteEntry.position)
+        .where(NoteEntry.note_id == note_id)
+        .order_by(NoteEntry.position, NoteEntry.id)
+        .offset(max(index - 2, 0))
+        .limit(2 if index > 1 else 1)
+    )
+    return list(result.scalars())
+
+async def insert_entry_async(db: AsyncSession, note_id: int, index: int, content: str) -> int:
+    """Insert an entry so it becomes the ``index``-th (1-based); past the end it is appended.
+
+    Takes the midpoint between its neighbours' positions; the note is
+    respaced only when two neighbours have no gap left between them.
+    Returns the new entry's id.
+    """
+    neighbours = await _neighbour_positions(db, note_id, index)
+    if index <= 1:
+        if not neighbours:
+            return await add_entry_async(db, note_id, content)
+        position = neighbours[0] - POSITION_GAP
+    elif len(neighbours) < 2:
+        return await add_entry_async(db, note_id, content)
+    else:
+        before, after = neighbours
+        if after - before < 2:
+            await _respace(db, note_id)
+            before, after = await _neighbour_positions(db, note_id, index)
+        position = (before + after) // 2
+    result = await db.execute(
+        insert(NoteEntry)
+        .values(note_id=note_id, content=content, position=position)
+        .returning(NoteEntry.id)
+    )
+    entry_id = result.scalar_one()
+    await _touch_note(db, note_id)
+    return entry_id
+
+async def delete_entry_async(db: AsyncSession, note_id: int, index: int) -> Optional[str]:
+    """Delete the ``index``-th (1-based) entry; returns its content, or None if there is no such entry."""
+    if index < 1:
+        return None
+    nth = (
+        select(NoteEntry.id)
+        .where(NoteEntry.note_id == note_id)
+        .order_by(NoteEntry.position, NoteEntry.id)
+        .offset(index - 1)
+        .limit(1)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        delete(NoteEntry)
+        .where(NoteEntry.id == nth)
+        .returning(NoteEntry.content)
+        .execution_options(synchronize_session=False)
+    )
+    content = result.scalar_one_or_none()
+    if content is not None:
+        await _touch_note(db, note_id)
+    return content
+
+async def delete_note_async(db: AsyncSession, note_id: int) -> bool:
+    """Delete a note and its entries with two set-based DELETEs instead of loading the entries."""
+    await db.execute(
+        delete(NoteEntry)
+        .where(NoteEntry.note_id == note_id)
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.execute(
+        delete(Note)
+        .where(Note.id == note_id)
+        .returning(Note.id)
+        .execution_options(synchronize_session=False)
+    )
+    return result.first() is not None
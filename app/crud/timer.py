@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models import Timer
+
+LIVE_STATUSES = ('active', 'paused')
+
+# ==================== Async Operations ====================
+
+async def create_timer_async(
+    db: AsyncSession,
+    user_id: int,
+    name: str,
+    duration_seconds: int,
+    end_time: datetime,
+    conversation_id: Optional[str] = None
+):
+    timer = Timer(
+        user_id=user_id,
+        conversation_id=conversation_id,
+        name=name,
+        duration_seconds=duration_seconds,
+        end_time=end_time,
+        status='active',
+        three_minute_warning_sent=False,
+        completion_notification_sent=False
+    )
+    db.add(timer)
+    await db.flush()
+    return timer
+
+async def get_live_timers_async(db: AsyncSession) -> List[Timer]:
+    """Every active or paused timer whose completion has not been announced."""
+    result = await db.execute(
+        select(Timer).where(
+            Timer.status.in_(LIVE_STATUSES),
+            Timer.completion_notification_sent.is_not(True)
+        )
+    )
+    return list(result.scalars())
+
+async def update_timer_async(db: AsyncSession, timer_id: int, from_statuses: Sequence[str], **values) -> bool:
+    """Compare-and-set: apply ``values`` only while the timer is in one of ``from_statuses``."""
+    result = await db.execute(
+        update(Timer)
+        .where(Timer.id == timer_id, Timer.status.in_(from_statuses))
+        .values(**values)
+        .returning(Timer.id)
+        .execution_options(synchronize_session=False)
+    )
+    return result.first() is not None
+
+async def _claim(db: AsyncSession, conditions, values, limit: int) -> List[Timer]:
+    # Rows another process is claiming right now are skipped, not waited on;
+    # the outer WHERE repeats the conditions so a row is never claimed twice
+    due = (
+        select(Timer.id)
+        .where(*conditions)
+        .order_by(Timer.end_time)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    result = await db.execute(
+        update(Timer)
+        .where(Timer.id.in_(due.scalar_subquery()), *conditions)
+        .values(**values)
+        .returning(Timer)
+        .execution_options(synchronize_session=False)
+    )
+    return list(result.scalars())
+
+async def claim_due_warnings_async(db: AsyncSession, now: datetime, warning_seconds: int, limit: int = 500) -> List[Timer]:
+    """Mark up to ``limit`` timers entering their warning window as warned, in one UPDATE ... RETURNING.
+
+    Only the caller gets the returned rows, so concurrent processes never
+    send the same warning twice.
+    """
+    conditions = (
+        Timer.status == 'active',
+        Timer.end_time <= now + timedelta(seconds=warning_seconds),
+        Timer.end_time > now,
+        Timer.duration_seconds > warning_seconds,
+        Timer.three_minute_warning_sent.is_not(True),
+    )
+    return await _claim(db, conditions, {"three_minute_warning_sent": True}, limit)
+
+async def claim_due_completions_async(db: AsyncSession, now: datetime, limit: int = 500) -> List[Timer]:
+    """Complete up to ``limit`` active timers that ended by ``now``, in one UPDATE ... RETURNING."""
+    conditions = (
+        Timer.status == 'active',
+        Timer.end_time <= now,
+    )
+    return await _claim(db, conditions, {"status": 'completed', "completion_notification_sent": True}, limit)
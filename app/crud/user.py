@@ -1,3 +1,6 @@
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.db.models import User
 from typing import Optional
@@ -21,4 +24,59 @@ def create_or_get_user(db: Session, username: str, name: Optional[str] = None):
         return user
     else:
         return create_user(db, name or username, username)
-        
\ No newline at end of file
+
+# ==================== Async Operations ====================
+
+async def create_user_async(db: AsyncSession, name: str, username: str):
+    user = User(name=name, username=username)
+    db.add(user)
+    await db.flush()
+    return user
+
+async def get_user_async(db: AsyncSession, user_id: int):
+    return await db.get(User, user_id)
+
+async def get_user_by_username_async(db: AsyncSession, username: str):
+    result = await db.execute(select(User).where(User.username == username))
+    return result.scalars().first()
+
+async def create_or_get_user_async(db: AsyncSession, username: str, name: Optional[str] = None):
+    user = await get_user_by_username_async(db, username)
+    if user:
+        return user
+    else:
+        return await create_user_async(db, name or username, username)
+
+async def get_user_by_discord_id_async(db: AsyncSession, discord_id: int):
+    result = await db.execute(select(User).where(User.discord_id == discord_id))
+    return result.scalars().first()
+
+def _insert_ignoring_conflicts(db: AsyncSession, **values):
+    dialect = sqlite if db.bind.dialect.name == "sqlite" else postgresql
+    return dialect.insert(User).values(**values).on_conflict_do_nothing().returning(User)
+
+async def get_or_create_user_by_discord_id_async(db: AsyncSession, discord_id: int, username: str, name: Optional[str] = None):
+    """Known users cost one indexed lookup; new users a single INSERT ... ON CONFLICT DO NOTHING RETURNING."""
+    user = await get_user_by_discord_id_async(db, discord_id)
+    if user:
+        return user
+    insert_user = _insert_ignoring_conflicts(db, discord_id=discord_id, username=username, name=name or username)
+    user = (await db.execute(insert_user)).scalars().first()
+    if user is None:
+        # A concurrent message may have inserted this user first
+        user = await get_user_by_discord_id_async(db, discord_id)
+    if user is None:
+        # Otherwise the username is held by another row: either a legacy row
+        # created before discord_id existed, which is claimed, or another
+        # account, which is left alone while this one gets a suffixed name.
+        holder = await get_user_by_username_async(db, username)
+        if holder is not None and holder.discord_id is None:
+            holder.discord_id = discord_id
+            await db.flush()
+            user = holder
+        else:
+            insert_user = _insert_ignoring_conflicts(
+                db, discord_id=discord_id, username=f"{username}#{discord_id}", name=name or username
+            )
+            user = (await db.execute(insert_user)).scalars().first() or await get_user_by_discord_id_async(db, discord_id)
+    return user
@@ -0,0 +1,62 @@
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from dotenv import load_dotenv
+
+from app.db.pool import PoolMetrics, engine_options
+
+load_dotenv()
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+if not DATABASE_URL:
+    raise RuntimeError("DATABASE_URL environment variable is not set")
+
+# asyncio DBAPI driver to use for each backend when DATABASE_URL names a sync one
+_ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    """Swap the sync driver in a database URL for its asyncio counterpart."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    driver = _ASYNC_DRIVERS.get(backend)
+    if driver is None or parsed.get_driver_name() == driver:
+        return url
+    return parsed.set(drivername=f"{backend}+{driver}").render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL))
+
+async_pool_metrics = PoolMetrics()
+async_pool_metrics.instrument(async_engine.sync_engine.pool)
+
+# expire_on_commit=False so ORM objects stay readable after commit without a refresh round-trip
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+def get_async_db_session() -> AsyncSession:
+    """Create and return a new async database session"""
+    return AsyncSessionLocal()
+
+@asynccontextmanager
+async def async_session_scope() -> AsyncIterator[AsyncSession]:
+    """Async unit of work: one session per handled message, committed on success, rolled back on error."""
+    session = AsyncSessionLocal()
+    try:
+        start = time.perf_counter()
+        await session.connection()
+        async_pool_metrics.record_wait(time.perf_counter() - start)
+        yield session
+        await session.commit()
+    except Exception:
+        await session.rollback()
+        raise
+    finally:
+        await session.close()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, Integer, String, Text, DateTime, Boolean, func
+from sqlalchemy import BigInteger, Column, ForeignKey, Index, Integer, String, Text, DateTime, Boolean, func, text
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 
@@ -8,6 +8,7 @@ class User(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
     username = Column(String(100), unique=True, index=True)
+    discord_id = Column(BigInteger, unique=True, index=True, nullable=True, comment='Discord user snowflake')
     
     # Relationships
     notes = relationship("Note", back_populates="user")
@@ -18,17 +19,26 @@ class Conversation(Base):
     __tablename__ = "conversations"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     title = Column(String(200), nullable=False)
+    last_sequence_number = Column(Integer, nullable=False, default=0, server_default="0", comment='Highest message sequence number allocated so far')
+    summary = Column(Text, nullable=True, comment='Rolling summary of messages up to summarized_through')
+    summarized_through = Column(Integer, nullable=False, default=0, server_default="0", comment='Highest message sequence number folded into summary')
 
     user = relationship("User", back_populates="conversations")
     messages = relationship("Message", back_populates="conversation")
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("uq_messages_conversation_id_sequence_number", "conversation_id", "sequence_number", unique=True),
+        # Full-text search; queries must use the same to_tsvector('english', content) expression
+        Index("ix_messages_content_fts", text("to_tsvector('english', content)"), postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    conversation_id = Column(Integer, ForeignKey("conversations.id"), nullable=False, index=True)
+    # Indexed through uq_messages_conversation_id_sequence_number, which also serves latest-N reads
+    conversation_id = Column(Integer, ForeignKey("conversations.id"), nullable=False)
     role = Column(String(50), nullable=False)
     content = Column(Text, nullable=False)
     timestamp = Column(DateTime, default=func.now(), nullable=False)  # Changed from Integer to DateTime
@@ -47,6 +57,11 @@ class Timer(Base):
         ('completed', 'Completed'),
         ('cancelled', 'Cancelled'),
     ]
+    __table_args__ = (
+        # The scheduler's hot path: active timers ordered by deadline
+        Index("ix_timers_active_end_time", "end_time", postgresql_where=text("status = 'active'"), sqlite_where=text("status = 'active'")),
+        Index("ix_timers_user_id_status", "user_id", "status"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
@@ -82,10 +97,21 @@ class Note(Base):
     
     # Relationships 
     user = relationship("User", back_populates="notes")
-    entries = relationship("NoteEntry", back_populates="note", cascade="all, delete-orphan")
+    entries = relationship(
+        "NoteEntry",
+        back_populates="note",
+        cascade="all, delete-orphan",
+        order_by="[NoteEntry.position, NoteEntry.id]",
+        passive_deletes=True
+    )
 
 class NoteEntry(Base):
     __tablename__ = "note_entries"
+    __table_args__ = (
+        # Ordered reads of a note, and MAX(position) for appends
+        Index("ix_note_entries_note_id_position", "note_id", "position"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     note_id = Column(Integer, ForeignKey("notes.id", ondelete="CASCADE"), nullable=False)
     content = Column(Text, nullable=False)
@@ -97,4 +123,13 @@ class NoteEntry(Base):
     note = relationship("Note", back_populates="entries")
 
 
+class NotesSession(Base):
+    """Notes-mode state of a conversation; only conversations inside notes mode have a row."""
+    __tablename__ = "notes_sessions"
 
+    conversation_id = Column(String(100), primary_key=True, comment='External conversation identifier')
+    in_notes_mode = Column(Boolean, nullable=False, default=False)
+    current_note_id = Column(Integer, ForeignKey("notes.id", ondelete="SET NULL"), nullable=True)
+    view = Column(String(20), nullable=False, default='none', comment="'none', 'list' or 'detail'")
+    # Rows idle for longer than the store's TTL are ignored and purged
+    updated_at = Column(DateTime, nullable=False, default=func.now(), index=True)
@@ -0,0 +1,87 @@
+import threading
+from typing import Any, Dict
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import Pool
+
+from app import config
+
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """Build create_engine keyword arguments from the pool settings in app.config."""
+    options: Dict[str, Any] = {
+        "echo": config.DB_ECHO,
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+        "pool_recycle": config.DB_POOL_RECYCLE,
+    }
+    # SQLite uses its own pool classes which don't accept sizing arguments
+    if make_url(url).get_backend_name() != "sqlite":
+        options.update(
+            pool_size=config.DB_POOL_SIZE,
+            max_overflow=config.DB_MAX_OVERFLOW,
+            pool_timeout=config.DB_POOL_TIMEOUT,
+        )
+    return options
+
+
+class PoolMetrics:
+    """Counts pool checkouts and records how long units of work waited for a connection."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.waits = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self._pool = None
+
+    def instrument(self, pool: Pool) -> None:
+        """Attach pool event listeners that feed these counters."""
+        event.listen(pool, "connect", self._on_connect)
+        event.listen(pool, "checkout", self._on_checkout)
+        event.listen(pool, "checkin", self._on_checkin)
+        event.listen(pool, "invalidate", self._on_invalidate)
+        self._pool = pool
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.waits += 1
+            self.total_wait_seconds += seconds
+            if seconds > self.max_wait_seconds:
+                self.max_wait_seconds = seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return current counters together with the pool's live occupancy."""
+        with self._lock:
+            stats = {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "avg_wait_ms": (self.total_wait_seconds / self.waits * 1000) if self.waits else 0.0,
+                "max_wait_ms": self.max_wait_seconds * 1000,
+            }
+        if self._pool is not None:
+            for name in ("size", "checkedin", "checkedout", "overflow"):
+                if hasattr(self._pool, name):
+                    stats[f"pool_{name}"] = getattr(self._pool, name)()
+        return stats
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.checkins += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
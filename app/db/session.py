@@ -1,18 +1,42 @@
 import os
+import time
+from contextlib import contextmanager
+from typing import Iterator
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from dotenv import load_dotenv
 
+from app.db.pool import PoolMetrics, engine_options
+
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL environment variable is not set")
 
-engine = create_engine(DATABASE_URL, echo=True)
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+
+pool_metrics = PoolMetrics()
+pool_metrics.instrument(engine.pool)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def get_db_session():
     """Create and return a new database session"""
-    return SessionLocal()
\ No newline at end of file
+    return SessionLocal()
+
+@contextmanager
+def session_scope() -> Iterator[Session]:
+    """Unit of work: one session, committed on success, rolled back on error, always closed."""
+    session = SessionLocal()
+    try:
+        start = time.perf_counter()
+        session.connection()
+        pool_metrics.record_wait(time.perf_counter() - start)
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
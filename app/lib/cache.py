@@ -0,0 +1,223 @@
+import sys
+import time
+from collections import OrderedDict, deque
+from itertools import islice
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional, Set
+
+from app import config
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Bounded mapping with least-recently-used eviction, optional TTL and hit/miss counters.
+
+    With ``sliding=True`` every hit pushes the entry's expiry out by ``ttl``
+    again, so entries expire after being idle rather than after a fixed age.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sliding: bool = False
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.sliding = sliding
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key, _MISSING)
+        if item is _MISSING:
+            self.misses += 1
+            return default
+        expires_at, value = item
+        if expires_at is not None and expires_at <= self._clock():
+            del self._data[key]
+            self.misses += 1
+            return default
+        if self.sliding and self.ttl is not None:
+            self._data[key] = (self._clock() + self.ttl, value)
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = self._clock() + ttl if ttl is not None else None
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def purge_expired(self) -> int:
+        """Drop every expired entry; returns how many were removed."""
+        now = self._clock()
+        expired = [key for key, (expires_at, _) in self._data.items() if expires_at is not None and expires_at <= now]
+        for key in expired:
+            del self._data[key]
+        self.evictions += len(expired)
+        return len(expired)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class CachedMessage:
+    """Compact cached chat message; ``timestamp`` is a POSIX time."""
+
+    __slots__ = ("role", "content", "timestamp", "metadata")
+
+    def __init__(self, role: str, content: str, timestamp: float, metadata: Optional[Dict[str, Any]] = None):
+        self.role = sys.intern(role)
+        self.content = content
+        self.timestamp = timestamp
+        self.metadata = metadata or None  # empty dicts are not worth keeping
+
+    def size(self) -> int:
+        """Approximate resident size in bytes."""
+        size = _MESSAGE_OVERHEAD + sys.getsizeof(self.content)
+        if self.metadata:
+            size += sys.getsizeof(self.metadata)
+        return size
+
+
+# CachedMessage instance plus its float timestamp
+_MESSAGE_OVERHEAD = 96
+
+
+class ConversationCache:
+    """Recent messages per conversation under a per-conversation cap and a global byte budget.
+
+    Each conversation keeps at most ``max_messages`` of its newest messages.
+    When the total estimated size exceeds ``max_bytes``, whole conversations
+    are evicted least recently used first. A conversation is *complete* when
+    the cache holds all of its messages, not just the newest ones.
+    """
+
+    def __init__(self, max_messages: int = 200, max_bytes: int = 64 * 1024 * 1024):
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self._conversations: "OrderedDict[str, Deque[CachedMessage]]" = OrderedDict()
+        self._complete: Set[str] = set()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evicted_conversations = 0
+        self.trimmed_messages = 0
+
+    def append(self, conversation_id: str, message: CachedMessage) -> None:
+        messages = self._conversations.get(conversation_id)
+        if messages is None:
+            messages = self._conversations[conversation_id] = deque()
+        else:
+            self._conversations.move_to_end(conversation_id)
+        messages.append(message)
+        self._bytes += message.size()
+        while len(messages) > self.max_messages:
+            self._bytes -= messages.popleft().size()
+            self.trimmed_messages += 1
+            self._complete.discard(conversation_id)
+        self._evict()
+
+    def get(self, conversation_id: str, limit: Optional[int] = None) -> Optional[List[CachedMessage]]:
+        """The newest ``limit`` cached messages, oldest first, or None if the conversation is not cached."""
+        messages = self._conversations.get(conversation_id)
+        if messages is None:
+            self.misses += 1
+            return None
+        self._conversations.move_to_end(conversation_id)
+        self.hits += 1
+        if limit and limit < len(messages):
+            return list(islice(messages, len(messages) - limit, None))
+        return list(messages)
+
+    def replace(self, conversation_id: str, messages: List[CachedMessage], complete: bool = False) -> None:
+        """Cache the newest messages of a conversation, e.g. after reading them from the database."""
+        self.discard(conversation_id)
+        kept = deque(messages[-self.max_messages:]) if self.max_messages else deque()
+        self._conversations[conversation_id] = kept
+        if complete and len(kept) == len(messages):
+            self._complete.add(conversation_id)
+        self._bytes += sum(message.size() for message in kept)
+        self._evict()
+
+    def retain(self, conversation_id: str, keep: Callable[[CachedMessage], bool]) -> None:
+        messages = self._conversations.get(conversation_id)
+        if messages is None:
+            return
+        kept = deque(message for message in messages if keep(message))
+        self._bytes -= sum(message.size() for message in messages) - sum(message.size() for message in kept)
+        self._conversations[conversation_id] = kept
+
+    def is_complete(self, conversation_id: str) -> bool:
+        return conversation_id in self._complete
+
+    def discard(self, conversation_id: str) -> None:
+        self._complete.discard(conversation_id)
+        messages = self._conversations.pop(conversation_id, None)
+        if messages is not None:
+            self._bytes -= sum(message.size() for message in messages)
+
+    def items(self):
+        return self._conversations.items()
+
+    def __contains__(self, conversation_id: str) -> bool:
+        return conversation_id in self._conversations
+
+    def __len__(self) -> int:
+        return len(self._conversations)
+
+    def message_count(self) -> int:
+        return sum(len(messages) for messages in self._conversations.values())
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "conversations": len(self._conversations),
+            "messages": self.message_count(),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "max_messages_per_conversation": self.max_messages,
+            "evicted_conversations": self.evicted_conversations,
+            "trimmed_messages": self.trimmed_messages,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _evict(self) -> None:
+        # Never evict the conversation that was just touched
+        while self._bytes > self.max_bytes and len(self._conversations) > 1:
+            conversation_id, messages = self._conversations.popitem(last=False)
+            self._complete.discard(conversation_id)
+            self._bytes -= sum(message.size() for message in messages)
+            self.evicted_conversations += 1
+
+
+# Discord user ID -> (users.id, conversations.id), shared by UserManager and MemoryStore
+identity_cache = LRUCache(maxsize=config.IDENTITY_CACHE_SIZE, ttl=config.IDENTITY_CACHE_TTL)
@@ -5,7 +5,19 @@ from app.core.abilities.timer_ability import TimerAbility
 from app.core.bruno_agent import AgentConfig, BrunoAgent
 from app.core.bruno_llm import OllamaClient
 from app.core.bruno_memory import MemoryManager
+from app.core.embeddings import OllamaEmbedder
+from app.core.intent_router import IntentRouter
+from app.core.llm_cache import CoalescingLLMClient
+from app.core.llm_router import LLMRouter
+from app.core.llm_scheduler import LLMScheduler
+from app.core.summarizer import ConversationSummarizer
+from app.core.timer_engine import TimerEngine
+from app.core.tokens import TokenCounter
+from app.core.vector_memory import VectorMemoryStore
 from bruno_core.interfaces import LLMInterface
+from app import config as app_config
+from app.lib.memory_backend import DatabaseMemoryBackend
+from app.lib.notes_state import DatabaseNotesStateStore, InMemoryNotesStateStore
 import os
 
 def get_agent_config() -> AgentConfig:
@@ -13,30 +25,121 @@ def get_agent_config() -> AgentConfig:
         name="default_agent",
         model=os.getenv("LLM_MODEL"),
         llm_provider=os.getenv("LLM_PROVIDER"),
-        base_url=os.getenv("LLM_API_URL")
+        base_url=os.getenv("LLM_API_URL"),
+        context_window=app_config.LLM_CONTEXT_WINDOW,
+        history_messages=app_config.LLM_HISTORY_MESSAGES,
+        memory_top_k=app_config.MEMORY_TOP_K,
+        memory_min_similarity=app_config.MEMORY_MIN_SIMILARITY
+    )
+
+def _get_ollama_client(base_url: str, model: str, token_counter: TokenCounter) -> OllamaClient:
+    return OllamaClient(
+        base_url=base_url,
+        model=model,
+        connection_limit=app_config.LLM_HTTP_LIMIT,
+        connection_limit_per_host=app_config.LLM_HTTP_LIMIT_PER_HOST,
+        keepalive_timeout=app_config.LLM_HTTP_KEEPALIVE,
+        connect_timeout=app_config.LLM_HTTP_CONNECT_TIMEOUT,
+        request_timeout=app_config.LLM_HTTP_TIMEOUT,
+        api_mode=app_config.LLM_API_MODE,
+        keep_alive=app_config.LLM_KEEP_ALIVE,
+        reuse_context=app_config.LLM_REUSE_CONTEXT,
+        num_ctx=app_config.LLM_CONTEXT_WINDOW,
+        token_counter=token_counter
     )
 
 def get_llm_client() -> LLMInterface:
     config = get_agent_config()
     if config.llm_provider == "ollama":
-        return OllamaClient(
-            base_url=config.base_url,
-            model=config.model
+        # One counter for all endpoints: they serve the same model
+        token_counter = TokenCounter(
+            tokenizer_path=app_config.LLM_TOKENIZER_PATH,
+            chars_per_token=app_config.LLM_CHARS_PER_TOKEN,
+            cache_size=app_config.LLM_TOKEN_CACHE_SIZE
         )
+        if len(app_config.LLM_API_URLS) > 1:
+            client = LLMRouter(
+                [_get_ollama_client(url, config.model, token_counter) for url in app_config.LLM_API_URLS],
+                strategy=app_config.LLM_ROUTER_STRATEGY,
+                failure_threshold=app_config.LLM_ROUTER_FAILURE_THRESHOLD,
+                cooldown=app_config.LLM_ROUTER_COOLDOWN,
+                health_check_interval=app_config.LLM_HEALTH_CHECK_INTERVAL
+            )
+        else:
+            base_url = app_config.LLM_API_URLS[0] if app_config.LLM_API_URLS else config.base_url
+            client = _get_ollama_client(base_url, config.model, token_counter)
     else:
         raise ValueError(f"Unsupported LLM provider: {config.llm_provider}")
+    if app_config.LLM_MAX_CONCURRENCY > 0:
+        # The router spreads the admitted requests, so each endpoint gets its share of the cap
+        client = LLMScheduler(
+            client,
+            max_concurrency=app_config.LLM_MAX_CONCURRENCY * max(len(app_config.LLM_API_URLS), 1),
+            max_queue_wait=app_config.LLM_MAX_QUEUE_WAIT
+        )
+    # Outermost, so duplicate prompts never take a scheduler slot
+    client = CoalescingLLMClient(
+        client,
+        cache_size=app_config.LLM_RESPONSE_CACHE_SIZE,
+        cache_ttl=app_config.LLM_RESPONSE_CACHE_TTL,
+        cache_max_temperature=app_config.LLM_RESPONSE_CACHE_MAX_TEMPERATURE
+    )
+    return client
+
+def get_vector_store() -> VectorMemoryStore:
+    embedder = OllamaEmbedder(
+        base_url=app_config.MEMORY_EMBED_URL or app_config.LLM_API_URL,
+        model=app_config.MEMORY_EMBED_MODEL,
+        keep_alive=app_config.LLM_KEEP_ALIVE
+    )
+    return VectorMemoryStore(embedder, path=app_config.MEMORY_INDEX_PATH)
 
-def get_agent() -> BrunoAgent:
-    notes_ability = NotesAbility()
-    timer_ability = TimerAbility()
-    memory_manager = MemoryManager()
+def get_summarizer(llm_client: LLMInterface) -> ConversationSummarizer:
+    return ConversationSummarizer(
+        llm_client,
+        keep_recent=app_config.LLM_HISTORY_MESSAGES,
+        batch_size=app_config.SUMMARY_BATCH_SIZE,
+        min_messages=app_config.SUMMARY_MIN_MESSAGES,
+        idle_seconds=app_config.SUMMARY_IDLE_SECONDS,
+        max_tokens=app_config.SUMMARY_MAX_TOKENS
+    )
+
+def get_notes_state_store():
+    if app_config.NOTES_STATE_BACKEND == "database":
+        return DatabaseNotesStateStore(
+            ttl=app_config.NOTES_STATE_TTL,
+            cache_size=app_config.NOTES_STATE_CACHE_SIZE,
+            cache_ttl=app_config.NOTES_STATE_CACHE_TTL
+        )
+    if app_config.NOTES_STATE_BACKEND != "memory":
+        raise ValueError(f"Unsupported notes state backend: {app_config.NOTES_STATE_BACKEND}")
+    return InMemoryNotesStateStore(maxsize=app_config.NOTES_STATE_CACHE_SIZE, ttl=app_config.NOTES_STATE_TTL)
+
+def get_agent(history_loader=None) -> BrunoAgent:
     llm_client = get_llm_client()
+    intent_router = IntentRouter(llm_client, llm_fallback=app_config.INTENT_LLM_FALLBACK)
+    notes_ability = NotesAbility(router=intent_router, state_store=get_notes_state_store())
+    timer_ability = TimerAbility(
+        engine=TimerEngine(warning_seconds=app_config.TIMER_WARNING_SECONDS),
+        router=intent_router
+    )
+    memory_manager = MemoryManager(
+        db_backend=DatabaseMemoryBackend(),
+        vector_store=get_vector_store() if app_config.MEMORY_ENABLED else None,
+        max_messages_per_conversation=app_config.MEMORY_CACHE_MAX_MESSAGES,
+        max_cache_bytes=app_config.MEMORY_CACHE_MAX_BYTES,
+        max_sessions=app_config.SESSION_CACHE_SIZE,
+        session_idle_ttl=app_config.SESSION_IDLE_TTL,
+        db_cache_ttl=app_config.MEMORY_CACHE_DB_TTL
+    )
     agent = BrunoAgent(
         config=get_agent_config(),
         llm_client=llm_client,
         memory_manager=memory_manager,
         notes_ability=notes_ability,
-        timer_ability=timer_ability
+        timer_ability=timer_ability,
+        intent_router=intent_router,
+        history_loader=history_loader
     )
     return agent    
 
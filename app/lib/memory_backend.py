@@ -0,0 +1,109 @@
+import logging
+from typing import Any, Dict, List, Optional
+
+from bruno_core.models import Message, MessageRole, MessageType
+
+from app.db.async_session import async_session_scope
+from app.lib.memory_store import AsyncMemoryStore
+
+logger = logging.getLogger(__name__)
+
+_ROLES = {role.value: role for role in MessageRole}
+
+
+def _db_id(conversation_id: str) -> Optional[int]:
+    """Database id for a MemoryManager conversation id, or None for ids that are not ours."""
+    try:
+        return int(conversation_id)
+    except (TypeError, ValueError):
+        return None
+
+
+class DatabaseMemoryBackend:
+    """Database backend for MemoryManager over the Message/Conversation tables.
+
+    Conversation and user ids are the string forms of the database ids that
+    MemoryManager passes around. Reads page through ``sequence_number`` with
+    keyset conditions (never OFFSET), so each page is a range scan on the
+    ``(conversation_id, sequence_number)`` index.
+    """
+
+    def __init__(self, session_scope=async_session_scope, page_size: int = 500):
+        self._session_scope = session_scope
+        self.page_size = page_size
+
+    async def get_messages(
+        self,
+        conversation_id: str,
+        limit: Optional[int] = None,
+        before_sequence: Optional[int] = None
+    ) -> List[Message]:
+        """Messages of a conversation, oldest first.
+
+        With ``limit``, the newest ``limit`` messages (before ``before_sequence``
+        if given, for paging backwards); otherwise the whole conversation.
+        """
+        db_id = _db_id(conversation_id)
+        if db_id is None:
+            return []
+        async with self._session_scope() as db:
+            store = AsyncMemoryStore(db)
+            if limit:
+                rows = list(reversed(await store.get_messages_before(db_id, limit, before=before_sequence)))
+            else:
+                rows = []
+                after = 0
+                while True:
+                    page = await store.get_messages_after(db_id, after, self.page_size)
+                    rows.extend(page)
+                    if len(page) < self.page_size:
+                        break
+                    after = page[-1].sequence_number
+        return [self._to_message(row, conversation_id) for row in rows]
+
+    async def save_message(self, conversation_id: str, message: Message) -> Optional[int]:
+        """Persist a message; returns its sequence number."""
+        db_id = _db_id(conversation_id)
+        if db_id is None:
+            logger.warning(f"Not persisting message for non-database conversation {conversation_id}")
+            return None
+        role = message.role.value if hasattr(message.role, 'value') else str(message.role)
+        async with self._session_scope() as db:
+            row = await AsyncMemoryStore(db).add_message(db_id, role, message.content)
+            return row.sequence_number
+
+    async def clear_conversation(self, conversation_id: str, keep_system_messages: bool = True) -> None:
+        db_id = _db_id(conversation_id)
+        if db_id is None:
+            return
+        async with self._session_scope() as db:
+            deleted = await AsyncMemoryStore(db).delete_messages(db_id, keep_system_messages=keep_system_messages)
+        logger.info(f"Deleted {deleted} messages from conversation {conversation_id}")
+
+    async def search_messages(
+        self,
+        query: str,
+        user_id: Optional[str] = None,
+        limit: int = 10,
+        offset: int = 0
+    ) -> List[Dict[str, Any]]:
+        """Full-text search over stored messages, best match first."""
+        async with self._session_scope() as db:
+            return await AsyncMemoryStore(db).search_messages(
+                query,
+                user_id=int(user_id) if user_id is not None else None,
+                limit=limit,
+                offset=offset
+            )
+
+    @staticmethod
+    def _to_message(row, conversation_id: str) -> Message:
+        role, content, timestamp, sequence_number = row
+        return Message(
+            role=_ROLES.get(role, MessageRole.USER),
+            content=content,
+            message_type=MessageType.TEXT,
+            timestamp=timestamp,
+            metadata={"sequence_number": sequence_number},
+            conversation_id=conversation_id
+        )
@@ -1,9 +1,34 @@
-from app.db.session import get_db_session
+import asyncio
+import logging
+from sqlalchemy import and_, delete, event, func, insert, literal_column, select, update
+from app import config
+from app.db.async_session import async_session_scope
 from app.db.models import Conversation
+from app.lib.cache import identity_cache
 from app.db.models import Message  
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
+# Text search configuration of the ix_messages_content_fts index
+FTS_CONFIG = "'english'"
+
+
+def _reserve_sequence_numbers(conversation_id: int, count: int = 1):
+    """Atomically bump a conversation's message counter by ``count`` and return the new value.
+
+    The row lock taken by the UPDATE serializes concurrent writers, so the
+    returned range ``(value - count, value]`` is owned by the caller.
+    """
+    return (
+        update(Conversation)
+        .where(Conversation.id == conversation_id)
+        .values(last_sequence_number=Conversation.last_sequence_number + count)
+        .returning(Conversation.last_sequence_number)
+        .execution_options(synchronize_session=False)
+    )
+
 class MemoryStore:
     def __init__(self, db):
         self.db = db
@@ -26,8 +51,7 @@ class MemoryStore:
     
     def add_message(self, conversation_id: int, role: str, content: str, sequence_number: Optional[int] = None, intent: str = None, entities: str = None):
         if sequence_number is None:
-            last_message = self.db.query(Message).filter(Message.conversation_id == conversation_id).order_by(Message.sequence_number.desc()).first()
-            sequence_number = last_message.sequence_number + 1 if last_message else 1
+            sequence_number = self.db.execute(_reserve_sequence_numbers(conversation_id)).scalar_one()
         message = Message(
             conversation_id=conversation_id,
             role=role,
@@ -40,4 +64,322 @@ class MemoryStore:
         self.db.add(message)
         self.db.commit()
         self.db.refresh(message)
-        return message
\ No newline at end of file
+        return message
+
+class AsyncMemoryStore:
+    """Async counterpart of MemoryStore for use inside the event loop."""
+    def __init__(self, db, cache=identity_cache):
+        self.db = db
+        self.cache = cache
+
+    async def create_conversation(self, user_id: int, title: str, discord_id: Optional[int] = None):
+        conversation = Conversation(user_id=user_id, title=title)
+        self.db.add(conversation)
+        await self.db.flush()
+        if discord_id is not None:
+            self.cache.invalidate(discord_id)
+        return conversation
+
+    async def resolve_conversation_id(self, discord_id: int, user_id: int, title: str = "Discord Conversation") -> int:
+        """Get or create the user's conversation and cache (user_id, conversation_id) for the Discord user."""
+        conversation = await self.get_conversations_for_user(user_id)
+        if not conversation:
+            conversation = await self.create_conversation(user_id, title=title, discord_id=discord_id)
+        ids = (user_id, conversation.id)
+        # Cached once the caller's scope commits, so a rolled-back user or conversation is never handed out
+        event.listen(self.db.sync_session, "after_commit", lambda session: self.cache.set(discord_id, ids), once=True)
+        return conversation.id
+
+    async def get_conversation(self, conversation_id: int):
+        return await self.db.get(Conversation, conversation_id)
+
+    async def get_conversations_for_user(self, user_id: int):
+        result = await self.db.execute(select(Conversation).where(Conversation.user_id == user_id).limit(1))
+        return result.scalars().first()
+
+    # ==================== Message Operations ====================
+
+    async def get_recent_messages(self, conversation_id: int, limit: int) -> List[Dict[str, str]]:
+        """The latest ``limit`` messages of a conversation as role/content dicts, oldest first."""
+        result = await self.db.execute(
+            select(Message.role, Message.content)
+            .where(Message.conversation_id == conversation_id)
+            .order_by(Message.sequence_number.desc())
+            .limit(limit)
+        )
+        return [{"role": role, "content": content} for role, content in reversed(result.all())]
+
+    async def get_messages_between(self, conversation_id: int, after: int, through: int, limit: int) -> List[Dict[str, Any]]:
+        """Messages with ``after < sequence_number <= through``, oldest first, at most ``limit``."""
+        result = await self.db.execute(
+            select(Message.role, Message.content, Message.sequence_number)
+            .where(
+                Message.conversation_id == conversation_id,
+                Message.sequence_number > after,
+                Message.sequence_number <= through
+            )
+            .order_by(Message.sequence_number)
+            .limit(limit)
+        )
+        return [
+            {"role": role, "content": content, "sequence_number": sequence_number}
+            for role, content, sequence_number in result.all()
+        ]
+
+    async def get_messages_after(self, conversation_id: int, after: int, limit: int):
+        """Keyset page of (role, content, timestamp, sequence_number) rows after ``after``, oldest first."""
+        result = await self.db.execute(
+            select(Message.role, Message.content, Message.timestamp, Message.sequence_number)
+            .where(Message.conversation_id == conversation_id, Message.sequence_number > after)
+            .order_by(Message.sequence_number)
+            .limit(limit)
+        )
+        return result.all()
+
+    async def get_messages_before(self, conversation_id: int, limit: int, before: Optional[int] = None):
+        """Keyset page of (role, content, timestamp, sequence_number) rows before ``before``, newest first."""
+        stmt = (
+            select(Message.role, Message.content, Message.timestamp, Message.sequence_number)
+            .where(Message.conversation_id == conversation_id)
+            .order_by(Message.sequence_number.desc())
+            .limit(limit)
+        )
+        if before is not None:
+            stmt = stmt.where(Message.sequence_number < before)
+        result = await self.db.execute(stmt)
+        return result.all()
+
+    async def delete_messages(self, conversation_id: int, keep_system_messages: bool = True) -> int:
+        """Delete a conversation's messages and its summary; returns the number of messages removed."""
+        stmt = delete(Message).where(Message.conversation_id == conversation_id)
+        if keep_system_messages:
+            stmt = stmt.where(Message.role != "system")
+        result = await self.db.execute(stmt.execution_options(synchronize_session=False))
+        await self.db.execute(
+            update(Conversation)
+            .where(Conversation.id == conversation_id)
+            .values(summary=None, summarized_through=0)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    async def search_messages(self, query: str, user_id: Optional[int] = None, limit: int = 10, offset: int = 0) -> List[Dict[str, Any]]:
+        """Messages matching ``query``, best match first, optionally limited to one user's conversations.
+
+        On PostgreSQL this is a ``websearch_to_tsquery`` match ranked with
+        ``ts_rank_cd`` and served by the ``ix_messages_content_fts`` GIN index;
+        other databases fall back to an unranked substring match.
+        """
+        if not query.strip():
+            return []
+        if self.db.get_bind().dialect.name == "postgresql":
+            # Inlined so the expression matches the index definition exactly
+            document = func.to_tsvector(literal_column(FTS_CONFIG), Message.content)
+            ts_query = func.websearch_to_tsquery(literal_column(FTS_CONFIG), query)
+            rank = func.ts_rank_cd(document, ts_query)
+            match = document.op("@@")(ts_query)
+        else:
+            rank = literal_column("0.0")
+            match = and_(*(Message.content.icontains(term, autoescape=True) for term in query.split()))
+        stmt = (
+            select(
+                Message.conversation_id, Message.role, Message.content, Message.timestamp,
+                Message.sequence_number, Conversation.user_id, rank.label("rank")
+            )
+            .join(Conversation, Message.conversation_id == Conversation.id)
+            .where(match)
+            .order_by(rank.desc(), Message.id.desc())
+            .limit(limit)
+            .offset(offset)
+        )
+        if user_id is not None:
+            stmt = stmt.where(Conversation.user_id == user_id)
+        result = await self.db.execute(stmt)
+        return [dict(row._mapping) for row in result]
+
+    # ==================== Summary Operations ====================
+
+    async def get_summary(self, conversation_id: int) -> Optional[str]:
+        result = await self.db.execute(select(Conversation.summary).where(Conversation.id == conversation_id))
+        return result.scalar_one_or_none()
+
+    async def get_summary_state(self, conversation_id: int):
+        """(summary, summarized_through, last_sequence_number) for a conversation, or None."""
+        result = await self.db.execute(
+            select(Conversation.summary, Conversation.summarized_through, Conversation.last_sequence_number)
+            .where(Conversation.id == conversation_id)
+        )
+        return result.first()
+
+    async def save_summary(self, conversation_id: int, summary: str, through: int, previous_through: int) -> bool:
+        """Store a summary unless another writer advanced it since ``previous_through`` was read."""
+        result = await self.db.execute(
+            update(Conversation)
+            .where(Conversation.id == conversation_id, Conversation.summarized_through == previous_through)
+            .values(summary=summary, summarized_through=through)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+
+    async def add_message(self, conversation_id: int, role: str, content: str, sequence_number: Optional[int] = None, intent: str = None, entities: str = None):
+        if sequence_number is None:
+            result = await self.db.execute(_reserve_sequence_numbers(conversation_id))
+            sequence_number = result.scalar_one()
+        message = Message(
+            conversation_id=conversation_id,
+            role=role,
+            content=content,
+            timestamp=datetime.now(),
+            sequence_number=sequence_number,
+            intent=intent,
+            entities=entities
+        )
+        self.db.add(message)
+        await self.db.flush()
+        return message
+
+
+class MessageWriteQueue:
+    """Write-behind buffer that persists chat messages in batched multi-row inserts.
+
+    Messages are appended in memory and flushed by a background task once
+    ``batch_size`` rows are pending or ``flush_interval`` seconds have passed,
+    so persistence stays off the reply path. ``close()`` performs a final flush.
+
+    At most ``max_pending`` messages are buffered (the oldest are dropped
+    beyond that), and a batch that fails ``max_retries`` flushes in a row
+    is dropped instead of being retried forever.
+    """
+    def __init__(
+        self,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        session_scope=async_session_scope,
+        max_pending: Optional[int] = None,
+        max_retries: Optional[int] = None
+    ):
+        self.batch_size = batch_size or config.MESSAGE_FLUSH_BATCH_SIZE
+        self.flush_interval = flush_interval or config.MESSAGE_FLUSH_INTERVAL
+        self.max_pending = max_pending or config.MESSAGE_QUEUE_MAX_PENDING
+        self.max_retries = max_retries or config.MESSAGE_FLUSH_MAX_RETRIES
+        self._session_scope = session_scope
+        self._pending: List[Dict] = []
+        self._inflight: List[Dict] = []  # batch being written by flush()
+        self._failures = 0  # consecutive failed flushes
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start the background flush loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="message-write-queue")
+
+    def enqueue(self, conversation_id: int, role: str, content: str, intent: str = None, entities: str = None):
+        """Buffer a message for persistence; never touches the database."""
+        self._pending.append({
+            "conversation_id": conversation_id,
+            "role": role,
+            "content": content,
+            "timestamp": datetime.now(),
+            "intent": intent,
+            "entities": entities,
+        })
+        self._trim()
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    def _trim(self):
+        overflow = len(self._pending) - self.max_pending
+        if overflow > 0:
+            del self._pending[:overflow]
+            logger.error(f"Message queue full, dropped {overflow} unpersisted messages")
+
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    async def recent_messages(self, conversation_id: int, limit: int) -> List[Dict[str, str]]:
+        """The latest ``limit`` messages of a conversation, including ones not flushed yet."""
+        # Taken without awaiting, so every message is here, committed, or both
+        unflushed = [row for row in self._inflight + self._pending if row["conversation_id"] == conversation_id]
+        stored = []
+        if len(unflushed) < limit:
+            async with self._session_scope() as db:
+                rows = await AsyncMemoryStore(db).get_messages_before(conversation_id, limit)
+            stored = [{"role": role, "content": content} for role, content, _, _ in reversed(rows)]
+            # A batch committed during the query carries its sequence numbers; don't count it twice
+            committed = {row[3] for row in rows}
+            unflushed = [row for row in unflushed if row.get("sequence_number") not in committed]
+        pending = [{"role": row["role"], "content": row["content"]} for row in unflushed]
+        return (stored + pending)[-limit:]
+
+    async def flush(self) -> int:
+        """Persist everything buffered so far and return the number of rows written."""
+        async with self._flush_lock:
+            batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            self._inflight = batch
+            try:
+                async with self._session_scope() as db:
+                    await self._assign_sequence_numbers(db, batch)
+                    await db.execute(insert(Message), batch)
+            except BaseException:
+                # Cancellation included: nothing was committed, so the batch must not be lost
+                self._failures += 1
+                if self._failures >= self.max_retries:
+                    logger.error(f"Dropping {len(batch)} messages after {self._failures} failed flushes")
+                    self._failures = 0
+                else:
+                    # Put the batch back in front of anything enqueued meanwhile so order is kept
+                    self._pending = batch + self._pending
+                    self._trim()
+                raise
+            finally:
+                self._inflight = []
+            self._failures = 0
+            logger.debug(f"Flushed {len(batch)} messages")
+            return len(batch)
+
+    async def close(self):
+        """Stop the flush loop and durably write any remaining messages."""
+        if self._task is not None:
+            # Let the loop finish its current flush instead of cancelling it mid-write
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Final message flush failed, {len(self._pending)} messages not persisted: {e}", exc_info=True)
+
+    async def _assign_sequence_numbers(self, db, batch: List[Dict]):
+        counts: Dict[int, int] = {}
+        for row in batch:
+            counts[row["conversation_id"]] = counts.get(row["conversation_id"], 0) + 1
+        # One counter bump per conversation per batch; lock rows in id order to avoid deadlocks
+        next_sequence_numbers: Dict[int, int] = {}
+        for conversation_id in sorted(counts):
+            result = await db.execute(_reserve_sequence_numbers(conversation_id, counts[conversation_id]))
+            next_sequence_numbers[conversation_id] = result.scalar_one() - counts[conversation_id] + 1
+        for row in batch:
+            row["sequence_number"] = next_sequence_numbers[row["conversation_id"]]
+            next_sequence_numbers[row["conversation_id"]] += 1
+
+    async def _run(self):
+        while not self._stopping:
+            # Back off while the database keeps failing
+            timeout = min(self.flush_interval * 2 ** self._failures, 60)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._stopping:
+                break
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Message flush failed, will retry: {e}", exc_info=True)
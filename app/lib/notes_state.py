@@ -0,0 +1,207 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import delete, event, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.db.async_session import async_session_scope
+from app.db.models import NotesSession
+from app.lib.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+class NotesModeState:
+    """Notes-mode state of one conversation."""
+
+    __slots__ = ("in_notes_mode", "current_note_id", "view")
+
+    def __init__(self, in_notes_mode: bool = False, current_note_id: Optional[int] = None, view: str = 'none'):
+        self.in_notes_mode = in_notes_mode
+        self.current_note_id = current_note_id
+        self.view = view  # 'none', 'list', 'detail'
+
+    def copy(self, **changes: Any) -> "NotesModeState":
+        state = NotesModeState(self.in_notes_mode, self.current_note_id, self.view)
+        for key, value in changes.items():
+            setattr(state, key, value)  # unknown keys raise AttributeError
+        return state
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"in_notes_mode": self.in_notes_mode, "current_note_id": self.current_note_id, "view": self.view}
+
+
+_DEFAULT_STATE = NotesModeState()
+
+
+class InMemoryNotesStateStore:
+    """Per-conversation notes state in a bounded LRU cache.
+
+    A conversation's state expires after ``ttl`` seconds without use, and
+    the least recently used conversations are evicted beyond ``maxsize``.
+    Conversations outside notes mode take no space at all. The ``db``
+    arguments exist for interface parity with the database store.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: Optional[float] = 3600):
+        self._states = LRUCache(maxsize=maxsize, ttl=ttl, sliding=True)
+
+    async def get_state(self, conversation_id: str, db=None) -> NotesModeState:
+        """Get state for a conversation; treat the result as read-only."""
+        return self._states.get(conversation_id) or _DEFAULT_STATE
+
+    async def set_state(self, conversation_id: str, db=None, **changes: Any) -> NotesModeState:
+        """Update state for a conversation."""
+        state = (await self.get_state(conversation_id)).copy(**changes)
+        self._states.set(conversation_id, state)
+        return state
+
+    async def exit_notes(self, conversation_id: str, db=None) -> None:
+        """Exit notes mode."""
+        self._states.invalidate(conversation_id)
+
+    async def close(self) -> None:
+        """Nothing to release; for interface parity with the database store."""
+
+    def stats(self) -> Dict[str, Any]:
+        return self._states.stats()
+
+
+class DatabaseNotesStateStore:
+    """Notes state in the ``notes_sessions`` table, shared by every process and kept across restarts.
+
+    Reads go through a small local cache whose ``cache_ttl`` bounds how long
+    another process's change can go unseen (0 disables it). Rows idle for
+    longer than ``ttl`` read as the default state and are purged in bulk, in
+    the background, at most once per ``ttl``. Pass the caller's session as
+    ``db`` to write in its transaction, e.g. next to the note a state points
+    at; the cache then only learns the new state once that transaction commits.
+    """
+
+    def __init__(
+        self,
+        session_scope=async_session_scope,
+        ttl: float = 3600,
+        cache_size: int = 10000,
+        cache_ttl: float = 30
+    ):
+        self._session_scope = session_scope
+        self.ttl = ttl
+        self._cache = LRUCache(maxsize=cache_size, ttl=cache_ttl) if cache_ttl > 0 else None
+        self._last_purge = time.monotonic()
+        self._purge_task: Optional[asyncio.Task] = None
+        self._pending_key = ("notes_state_pending", id(self))  # Session.info key for uncommitted states
+
+    async def get_state(self, conversation_id: str, db=None) -> NotesModeState:
+        """Get state for a conversation; treat the result as read-only."""
+        if self._cache is not None:
+            state = self._cache.get(conversation_id)
+            if state is not None:
+                return state
+        async with self._scope(db) as session:
+            result = await session.execute(
+                select(NotesSession).where(
+                    NotesSession.conversation_id == conversation_id,
+                    NotesSession.updated_at >= self._cutoff()
+                )
+            )
+            row = result.scalars().first()
+        # Cache misses too: most conversations never enter notes mode
+        state = NotesModeState(row.in_notes_mode, row.current_note_id, row.view) if row else _DEFAULT_STATE
+        # A read in the caller's transaction may see its uncommitted writes, so only own reads are cached
+        if self._cache is not None and db is None:
+            self._cache.set(conversation_id, state)
+        return state
+
+    async def set_state(self, conversation_id: str, db=None, **changes: Any) -> NotesModeState:
+        """Update state for a conversation with one upsert."""
+        state = (await self.get_state(conversation_id, db)).copy(**changes)
+        values = {"conversation_id": conversation_id, "updated_at": datetime.now(), **state.as_dict()}
+        async with self._scope(db) as session:
+            dialect = sqlite if session.bind.dialect.name == "sqlite" else postgresql
+            upsert = dialect.insert(NotesSession).values(**values)
+            await session.execute(upsert.on_conflict_do_update(
+                index_elements=[NotesSession.conversation_id],
+                set_={key: upsert.excluded[key] for key in values if key != "conversation_id"}
+            ))
+        self._remember(conversation_id, state, db)
+        self._maybe_purge()
+        return state
+
+    async def exit_notes(self, conversation_id: str, db=None) -> None:
+        """Exit notes mode; the default state needs no row."""
+        async with self._scope(db) as session:
+            await session.execute(delete(NotesSession).where(NotesSession.conversation_id == conversation_id))
+        self._remember(conversation_id, _DEFAULT_STATE, db)
+
+    async def purge_expired(self) -> int:
+        """Delete every idle row; returns how many were removed."""
+        async with self._session_scope() as db:
+            result = await db.execute(delete(NotesSession).where(NotesSession.updated_at < self._cutoff()))
+        return result.rowcount or 0
+
+    async def close(self) -> None:
+        """Wait for a running purge to finish."""
+        if self._purge_task is not None:
+            await asyncio.gather(self._purge_task, return_exceptions=True)
+            self._purge_task = None
+
+    @asynccontextmanager
+    async def _scope(self, db):
+        if db is not None:
+            yield db
+        else:
+            async with self._session_scope() as db:
+                yield db
+
+    def _remember(self, conversation_id: str, state: NotesModeState, db=None) -> None:
+        """Cache ``state`` once it is committed: now for own sessions, on commit for the caller's."""
+        if self._cache is None:
+            return
+        if db is None:
+            self._cache.set(conversation_id, state)
+            return
+        # Until the caller commits, reads go to the database; a rollback leaves nothing cached
+        self._cache.invalidate(conversation_id)
+        session = db.sync_session
+        pending = session.info.get(self._pending_key)
+        if pending is None:
+            pending = session.info[self._pending_key] = {}
+            event.listen(session, "after_commit", self._on_commit)
+            event.listen(session, "after_rollback", self._on_rollback)
+        pending[conversation_id] = state
+
+    def _on_commit(self, session) -> None:
+        pending = session.info[self._pending_key]
+        for conversation_id, state in pending.items():
+            self._cache.set(conversation_id, state)
+        pending.clear()
+
+    def _on_rollback(self, session) -> None:
+        session.info[self._pending_key].clear()
+
+    def _maybe_purge(self) -> None:
+        # In a session of its own, so the table-wide DELETE never runs inside a user's request
+        if time.monotonic() - self._last_purge < self.ttl or (self._purge_task and not self._purge_task.done()):
+            return
+        self._last_purge = time.monotonic()
+        self._purge_task = asyncio.create_task(self._purge(), name="notes-state-purge")
+
+    async def _purge(self) -> None:
+        try:
+            removed = await self.purge_expired()
+        except Exception as e:
+            logger.error(f"Purging idle notes sessions failed: {e}", exc_info=True)
+            return
+        if removed:
+            logger.info(f"Purged {removed} idle notes sessions")
+
+    def _cutoff(self) -> datetime:
+        return datetime.now() - timedelta(seconds=self.ttl)
+
+    def stats(self) -> Dict[str, Any]:
+        return self._cache.stats() if self._cache is not None else {}
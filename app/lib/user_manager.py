@@ -1,5 +1,7 @@
 
+from typing import Optional
 from app.crud import user as user_crud
+from app.lib.cache import identity_cache
 
 class UserManager:
     def __init__(self, db):
@@ -8,4 +10,21 @@ class UserManager:
         user = user_crud.get_user_by_username(self.db, username)
         if not user:
             user = user_crud.create_user(self.db, "", username)
-        return user
\ No newline at end of file
+        return user
+
+class AsyncUserManager:
+    def __init__(self, db, cache=identity_cache):
+        self.db = db
+        self.cache = cache
+    async def get_user_by_username(self, username: str, discord_id: Optional[int] = None):
+        user = await user_crud.get_user_by_username_async(self.db, username)
+        if not user:
+            user = await user_crud.create_user_async(self.db, "", username)
+            if discord_id is not None:
+                self.cache.invalidate(discord_id)
+        return user
+    async def get_user_by_discord_id(self, discord_id: int, username: str):
+        user = await user_crud.get_or_create_user_by_discord_id_async(self.db, discord_id, username)
+        # The user may have just been created; drop any entry cached for this Discord ID
+        self.cache.invalidate(discord_id)
+        return user
@@ -0,0 +1,36 @@
+"""Add timer scheduling indexes
+
+Revision ID: 00bf78eac8fc
+Revises: 1b93ac2e51ae
+Create Date: 2026-10-16 14:08:51.402716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '00bf78eac8fc'
+down_revision: Union[str, Sequence[str], None] = '1b93ac2e51ae'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_timers_active_end_time',
+        'timers',
+        ['end_time'],
+        postgresql_where=sa.text("status = 'active'"),
+        sqlite_where=sa.text("status = 'active'")
+    )
+    op.create_index('ix_timers_user_id_status', 'timers', ['user_id', 'status'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_timers_user_id_status', table_name='timers')
+    op.drop_index('ix_timers_active_end_time', table_name='timers')
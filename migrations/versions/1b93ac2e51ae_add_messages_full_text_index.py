@@ -0,0 +1,36 @@
+"""Add full-text search index on message content
+
+Revision ID: 1b93ac2e51ae
+Revises: 9f8dbe54f112
+Create Date: 2026-10-16 11:32:04.905127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1b93ac2e51ae'
+down_revision: Union[str, Sequence[str], None] = '9f8dbe54f112'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Full-text search is PostgreSQL-only, like the model's ddl_if guard
+    if op.get_bind().dialect.name == "postgresql":
+        op.create_index(
+            'ix_messages_content_fts',
+            'messages',
+            [sa.text("to_tsvector('english', content)")],
+            postgresql_using='gin'
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_index('ix_messages_content_fts', table_name='messages')
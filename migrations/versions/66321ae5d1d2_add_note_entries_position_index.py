@@ -0,0 +1,28 @@
+"""Add note entries position index
+
+Revision ID: 66321ae5d1d2
+Revises: 00bf78eac8fc
+Create Date: 2026-10-16 16:47:12.583094
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '66321ae5d1d2'
+down_revision: Union[str, Sequence[str], None] = '00bf78eac8fc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_note_entries_note_id_position', 'note_entries', ['note_id', 'position'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_note_entries_note_id_position', table_name='note_entries')
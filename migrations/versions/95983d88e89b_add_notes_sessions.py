@@ -0,0 +1,38 @@
+"""Add notes sessions
+
+Revision ID: 95983d88e89b
+Revises: 66321ae5d1d2
+Create Date: 2026-10-16 19:23:40.118562
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '95983d88e89b'
+down_revision: Union[str, Sequence[str], None] = '66321ae5d1d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('notes_sessions',
+    sa.Column('conversation_id', sa.String(length=100), nullable=False, comment='External conversation identifier'),
+    sa.Column('in_notes_mode', sa.Boolean(), nullable=False),
+    sa.Column('current_note_id', sa.Integer(), nullable=True),
+    sa.Column('view', sa.String(length=20), nullable=False, comment="'none', 'list' or 'detail'"),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['current_note_id'], ['notes.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('conversation_id')
+    )
+    op.create_index(op.f('ix_notes_sessions_updated_at'), 'notes_sessions', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_notes_sessions_updated_at'), table_name='notes_sessions')
+    op.drop_table('notes_sessions')
@@ -0,0 +1,45 @@
+"""Add per-conversation message counter and unique message ordering
+
+Revision ID: 96f87fcb1d6a
+Revises: e0b3b5430fe0
+Create Date: 2026-10-16 09:12:41.318205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '96f87fcb1d6a'
+down_revision: Union[str, Sequence[str], None] = 'e0b3b5430fe0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('conversations', sa.Column('last_sequence_number', sa.Integer(), server_default='0', nullable=False, comment='Highest message sequence number allocated so far'))
+
+    # Renumber any duplicates left behind by the old read-max-plus-one allocation
+    op.execute("""
+        UPDATE messages SET sequence_number = ranked.rn
+        FROM (
+            SELECT id, ROW_NUMBER() OVER (PARTITION BY conversation_id ORDER BY sequence_number, id) AS rn
+            FROM messages
+        ) AS ranked
+        WHERE messages.id = ranked.id AND messages.sequence_number <> ranked.rn
+    """)
+    op.execute("""
+        UPDATE conversations SET last_sequence_number = COALESCE(
+            (SELECT MAX(sequence_number) FROM messages WHERE messages.conversation_id = conversations.id), 0
+        )
+    """)
+    op.create_index('uq_messages_conversation_id_sequence_number', 'messages', ['conversation_id', 'sequence_number'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_messages_conversation_id_sequence_number', table_name='messages')
+    op.drop_column('conversations', 'last_sequence_number')
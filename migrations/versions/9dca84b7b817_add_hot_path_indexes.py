@@ -0,0 +1,33 @@
+"""Add hot-path indexes for conversation and message lookups
+
+Revision ID: 9dca84b7b817
+Revises: 96f87fcb1d6a
+Create Date: 2026-10-16 10:03:17.904512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9dca84b7b817'
+down_revision: Union[str, Sequence[str], None] = '96f87fcb1d6a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Every incoming message resolves the user's conversation by user_id
+    op.create_index(op.f('ix_conversations_user_id'), 'conversations', ['user_id'], unique=False)
+    # "Latest N by sequence_number" is a backward scan of
+    # uq_messages_conversation_id_sequence_number, whose leading column also
+    # makes the single-column conversation_id index redundant.
+    op.drop_index(op.f('ix_messages_conversation_id'), table_name='messages')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('ix_messages_conversation_id'), 'messages', ['conversation_id'], unique=False)
+    op.drop_index(op.f('ix_conversations_user_id'), table_name='conversations')
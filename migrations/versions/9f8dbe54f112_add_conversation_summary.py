@@ -0,0 +1,30 @@
+"""Add rolling summary to conversations
+
+Revision ID: 9f8dbe54f112
+Revises: df77e3a05cb6
+Create Date: 2026-10-16 11:07:26.418735
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9f8dbe54f112'
+down_revision: Union[str, Sequence[str], None] = 'df77e3a05cb6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('conversations', sa.Column('summary', sa.Text(), nullable=True, comment='Rolling summary of messages up to summarized_through'))
+    op.add_column('conversations', sa.Column('summarized_through', sa.Integer(), server_default='0', nullable=False, comment='Highest message sequence number folded into summary'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('conversations', 'summarized_through')
+    op.drop_column('conversations', 'summary')
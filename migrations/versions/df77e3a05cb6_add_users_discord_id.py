@@ -0,0 +1,30 @@
+"""Add Discord snowflake ID to users
+
+Revision ID: df77e3a05cb6
+Revises: 9dca84b7b817
+Create Date: 2026-10-16 10:41:52.660318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'df77e3a05cb6'
+down_revision: Union[str, Sequence[str], None] = '9dca84b7b817'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('discord_id', sa.BigInteger(), nullable=True, comment='Discord user snowflake'))
+    op.create_index(op.f('ix_users_discord_id'), 'users', ['discord_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_users_discord_id'), table_name='users')
+    op.drop_column('users', 'discord_id')
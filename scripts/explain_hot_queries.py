@@ -0,0 +1,129 @@
+"""Run EXPLAIN on the bot's hot queries and fail if any of them stops using an index.
+
+Usage:
+    python -m scripts.explain_hot_queries                       # against DATABASE_URL
+    python -m scripts.explain_hot_queries --url sqlite:///explain.db --seed
+
+``--seed`` creates the schema and fills it with synthetic users, conversations
+and messages so the planner has realistic statistics to work with.
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+from typing import Dict, List
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, func, insert, select, text, update
+from sqlalchemy.engine import Connection, Engine
+
+from app.db.base import Base
+from app.db.models import Conversation, Message, User
+
+load_dotenv()
+
+
+def hot_queries() -> Dict[str, object]:
+    """The statements issued for (almost) every incoming Discord message."""
+    return {
+        "user_by_username": select(User).where(User.username == "user_42"),
+        "conversation_for_user": select(Conversation).where(Conversation.user_id == 42).limit(1),
+        "latest_messages": (
+            select(Message)
+            .where(Message.conversation_id == 42)
+            .order_by(Message.sequence_number.desc())
+            .limit(20)
+        ),
+        "reserve_sequence_numbers": (
+            update(Conversation)
+            .where(Conversation.id == 42)
+            .values(last_sequence_number=Conversation.last_sequence_number + 2)
+            .returning(Conversation.last_sequence_number)
+        ),
+    }
+
+
+def seed(engine: Engine, users: int, messages_per_conversation: int) -> None:
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        if conn.execute(select(func.count()).select_from(User)).scalar():
+            return
+        now = datetime.now()
+        conn.execute(insert(User), [{"id": i, "name": f"User {i}", "username": f"user_{i}"} for i in range(1, users + 1)])
+        conn.execute(
+            insert(Conversation),
+            [{"id": i, "user_id": i, "title": "Discord Conversation", "last_sequence_number": messages_per_conversation}
+             for i in range(1, users + 1)],
+        )
+        rows = []
+        for conversation_id in range(1, users + 1):
+            for seq in range(1, messages_per_conversation + 1):
+                rows.append({
+                    "conversation_id": conversation_id,
+                    "role": "user" if seq % 2 else "assistant",
+                    "content": f"message {seq}",
+                    "timestamp": now,
+                    "sequence_number": seq,
+                })
+            if len(rows) >= 10000:
+                conn.execute(insert(Message), rows)
+                rows = []
+        if rows:
+            conn.execute(insert(Message), rows)
+        conn.execute(text("ANALYZE"))
+
+
+def explain(conn: Connection, statement) -> List[str]:
+    sql = str(statement.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    if conn.dialect.name == "postgresql":
+        rows = conn.execute(text(f"EXPLAIN ANALYZE {sql}"))
+        return [row[0] for row in rows]
+    rows = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))
+    return [row[-1] for row in rows]
+
+
+def find_regressions(dialect: str, plan: List[str]) -> List[str]:
+    """Plan lines that indicate a full table scan or an explicit sort."""
+    problems = []
+    for line in plan:
+        if dialect == "postgresql":
+            if "Seq Scan" in line or line.strip().startswith("Sort"):
+                problems.append(line.strip())
+        elif (line.startswith("SCAN") and "USING" not in line) or "TEMP B-TREE" in line:
+            problems.append(line.strip())
+    return problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=os.getenv("DATABASE_URL"), help="database URL (defaults to DATABASE_URL)")
+    parser.add_argument("--seed", action="store_true", help="create the schema and seed synthetic data first")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--messages", type=int, default=50, help="messages per conversation when seeding")
+    args = parser.parse_args()
+    if not args.url:
+        parser.error("pass --url or set DATABASE_URL")
+
+    engine = create_engine(args.url)
+    if args.seed:
+        seed(engine, args.users, args.messages)
+
+    failed = False
+    with engine.connect() as conn:
+        for name, statement in hot_queries().items():
+            # EXPLAIN ANALYZE really executes the statement, so never keep its effects
+            transaction = conn.begin()
+            try:
+                plan = explain(conn, statement)
+            finally:
+                transaction.rollback()
+            problems = find_regressions(conn.dialect.name, plan)
+            print(f"== {name} {'REGRESSION' if problems else 'ok'}")
+            for line in plan:
+                print(f"   {line}")
+            failed = failed or bool(problems)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())